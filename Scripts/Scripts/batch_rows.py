@@ -20,6 +20,11 @@ import time
 from pathlib import Path
 from typing import List, Tuple
 
+# API responses via the shared cache in ../llm_cache.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from llm_cache import CACHE_MODES, cached_completion, set_cache_mode
+from llm_client import resolve_base_url
+
 # Optional dependency for .docx
 try:
     from docx import Document  # python-docx
@@ -69,14 +74,17 @@ def call_openai(messages: List[dict], model: str, temperature: float, max_tokens
     except Exception as e:
         raise RuntimeError("Please `python3 -m pip install openai` (>=1.0) to use this script") from e
 
-    client = OpenAI()
-    resp = client.chat.completions.create(
-        model=model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        messages=messages,
-    )
-    return resp.choices[0].message.content.strip()
+    def create():
+        client = OpenAI()
+        resp = client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=messages,
+        )
+        return resp.choices[0].message.content.strip()
+    return cached_completion(create, model=model, messages=messages,
+                             temperature=temperature, max_tokens=max_tokens, endpoint=resolve_base_url())
 
 
 def extract_row(text: str) -> Tuple[str, str]:
@@ -142,7 +150,10 @@ def main():
     ap.add_argument("--limit", type=int, default=None, help="Max files to process (e.g., 10, 25, 50)")
     ap.add_argument("--force", action="store_true", help="Re-process even if results already exist for a file")
     ap.add_argument("--model", type=str, default=MODEL, help="Model name (e.g., gpt-4o)")
+    ap.add_argument("--cache-mode", choices=CACHE_MODES, default=None,
+                    help="API response cache: auto (read at temperature 0, else off; default), read (reuse + store), write (refresh), off")
     args = ap.parse_args()
+    set_cache_mode(args.cache_mode)
 
     in_dir = Path(args.input)
     out_dir = Path(args.out)
@@ -10,11 +10,12 @@ import argparse, csv, json, sys, time
 from pathlib import Path
 from typing import List, Tuple, Optional
 
-# Optional dependency for .docx
-try:
-    from docx import Document
-except Exception:
-    Document = None
+# .docx text via the shared plaintext cache in ../docx_cache.py (python-docx loaded on a miss),
+# API responses via ../llm_cache.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from docx_cache import read_docx_text
+from llm_cache import CACHE_MODES, cached_completion, set_cache_mode
+from llm_client import resolve_base_url
 
 from datetime import datetime
 from openai import OpenAI
@@ -35,10 +36,10 @@ def read_text(path: Path) -> str:
     if path.suffix.lower() == ".txt":
         return path.read_text(encoding="utf-8", errors="ignore")
     if path.suffix.lower() == ".docx":
-        if Document is None:
+        try:
+            return read_docx_text(path)
+        except ImportError:
             raise RuntimeError("python-docx not installed. `python3 -m pip install python-docx`.")
-        doc = Document(str(path))
-        return "\n".join(p.text for p in doc.paragraphs)
     raise ValueError(f"Unsupported file type: {path.suffix}")
 
 def load_prompt(prompt_path: Path) -> str:
@@ -102,13 +103,16 @@ def row_looks_valid(row: str, expected_student: str) -> bool:
 client = OpenAI()  # reads OPENAI_API_KEY from env
 
 def call_openai(messages: List[dict], model: str, temperature: float, max_tokens: int) -> str:
-    resp = client.chat.completions.create(
-        model=model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        messages=messages,
-    )
-    return resp.choices[0].message.content.strip()
+    def create():
+        resp = client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=messages,
+        )
+        return resp.choices[0].message.content.strip()
+    return cached_completion(create, model=model, messages=messages,
+                             temperature=temperature, max_tokens=max_tokens, endpoint=resolve_base_url())
 
 # ---------- Annotation ----------
 def build_html(records: List[dict]) -> str:
@@ -233,7 +237,10 @@ def main():
     ap.add_argument("--model", type=str, default=MODEL)
     ap.add_argument("--annotate", action="store_true")
     ap.add_argument("--annotate_dir", type=str, default=None)
+    ap.add_argument("--cache-mode", choices=CACHE_MODES, default=None,
+                    help="API response cache: auto (read at temperature 0, else off; default), read (reuse + store), write (refresh), off")
     args = ap.parse_args()
+    set_cache_mode(args.cache_mode)
 
     in_dir = Path(args.input)
     out_dir = Path(args.outdir or f"out_rows_{now_stamp()}")
@@ -19,6 +19,9 @@ mkdir -p examples
 echo "Copying analysis scripts..."
 cp "../Data Formatted to Analyze/pk_screen_v2_2.py" scripts/
 cp "../Data Formatted to Analyze/recount_from_annot.py" scripts/
+cp "../Data Formatted to Analyze/docx_cache.py" scripts/
+cp "../Data Formatted to Analyze/llm_cache.py" scripts/
+cp "../Data Formatted to Analyze/llm_client.py" scripts/
 cp "../Data Formatted to Analyze/batch_rows_v3.py" scripts/ 2>/dev/null || true
 
 echo "Creating protocol documentation..."
@@ -8,12 +8,83 @@ Extracts structured data from each memo including:
 - Agentic moves
 - Notable features
 - Key quotes
+
+Memos written by pkwap_analyzer.py come with a validated JSON summary in
+pkwap_memos.jsonl (see memo_schema.py); when a memo's record matches its
+current text, the fields are taken from the record instead of the regexes.
+
+Extracted fields are kept in a SQLite index (pkwap_memos.sqlite in the memo
+folder) keyed by file path and sha256. Each run only re-extracts memos whose
+content changed (in --workers processes), drops rows for deleted memos, and
+computes the summary statistics with SQL. Results are written as JSON and CSV
+in memo-path order, so they do not depend on the number of workers.
+
+Usage:
+  python3 analyze_pkwap_memos.py
+  python3 analyze_pkwap_memos.py --memo-dir "PK-WAP Memos" --rebuild --workers 8
 """
 
+import argparse
+import csv
+import hashlib
 import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import json
 
+from memo_schema import CORPUS_FILE, PK_LAYERS, load_corpus
+
+MEMO_DIR = Path("PK-WAP Memos")
+RESULTS_JSON = Path("pkwap_analysis_results.json")
+RESULTS_CSV = Path("pkwap_analysis_results.csv")
+INDEX_FILE = "pkwap_memos.sqlite"
+EXTRACTOR_VERSION = 4  # bump when scan_memo() output changes; the index is rebuilt
+
+# Level names searched when there is no "Highest PK Level:" line; the first one
+# present (in this order) wins
+FALLBACK_LEVELS = {
+    'Inventising': 8,
+    'Structuring': 7,
+    'Observing': 6,
+    'Formalizing': 5,
+    'Property Noticing': 4,
+    'Image Making': 3,
+    'Image Having': 2,
+    'Primitive Knowing': 1
+}
+
+# Canonical "<n> - <name>" labels (memo_schema numbering and spelling) so each
+# level is one bucket whatever the memo wrote: "5 - Formalizing",
+# "V - formalising (clear)", and FALLBACK_LEVELS' "3 - Image Making" (which
+# PK_LAYERS puts at level 2; FALLBACK_LEVELS is left as is for extractor parity)
+_LAYER_KEYS = {re.sub(r'[^a-z]', '', name.lower()): i for i, name in enumerate(PK_LAYERS, 1)}
+_LAYER_KEYS['formalizing'] = 5
+_ROMAN_LEVELS = {'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5, 'VI': 6, 'VII': 7, 'VIII': 8}
+
+def canonical_level(pk_level):
+    """
+    One label per PK level: the layer name decides when it is recognised
+    (trailing notes ignored), otherwise the level number (arabic or roman);
+    anything else ("Unknown") is returned unchanged.
+    """
+    number, sep, name = pk_level.partition(' - ')
+    if not sep:
+        return pk_level
+    key = re.sub(r'[^a-z]', '', name.lower())
+    level = next((lvl for k, lvl in _LAYER_KEYS.items() if key.startswith(k)), None)
+    if level is None:
+        number = number.strip().upper()
+        level = int(number) if number.isdigit() else _ROMAN_LEVELS.get(number)
+    if level is None or not 1 <= level <= len(PK_LAYERS):
+        return pk_level
+    return f"{level} - {PK_LAYERS[level - 1]}"
+
+# The extract_* functions below are the reference implementations (one
+# case-insensitive regex search each over the whole memo); analyze_memo() uses
+# scan_memo(), which gives the same fields. validate_memo_extractor.py checks parity.
+
 def extract_pk_level(memo_text):
     """Extract the highest PK level reached."""
     # Look for "Highest PK Level: X" pattern
@@ -24,18 +95,7 @@ def extract_pk_level(memo_text):
         return f"{level} - {name}"
     
     # Alternative pattern: look for level names in context
-    levels = {
-        'Inventising': 8,
-        'Structuring': 7,
-        'Observing': 6,
-        'Formalizing': 5,
-        'Property Noticing': 4,
-        'Image Making': 3,
-        'Image Having': 2,
-        'Primitive Knowing': 1
-    }
-    
-    for level_name, level_num in levels.items():
+    for level_name, level_num in FALLBACK_LEVELS.items():
         if level_name in memo_text:
             return f"{level_num} - {level_name}"
     
@@ -89,6 +149,82 @@ def extract_quotes(memo_text):
     # Return first 2-3 interesting quotes
     return quotes[:3] if quotes else []
 
+_HIGHEST_RE = re.compile(r'Highest PK Level:\s*(\d+|[IV]+)\s*[–-]\s*([^\n]+)', re.IGNORECASE)
+_RECURSIONS_RE = re.compile(r'Recursions?[:\s]+(\d+)', re.IGNORECASE)
+_FOLDBACK_RE = re.compile(r'\bfold-?back\b')
+_RECURSIVE_MOVE_RE = re.compile(r'\brecursive\s+movement\b')
+_SECTION_RES = {
+    'agentic': re.compile(r'Agentic Moves?:?\s*\n(.*?)(?:\n\n|\n#|\Z)', re.DOTALL | re.IGNORECASE),
+    'notable': re.compile(r'Notable Features?:?\s*\n(.*?)(?:\n\n|\n#|\Z)', re.DOTALL | re.IGNORECASE),
+}
+_ITEM_RE = re.compile(r'(?:[-*•]\s+|^\d+\.\s+)(.+)', re.MULTILINE)
+_QUOTE_RE = re.compile(r'"([^"]+)"')
+
+def _anchored(lowered, text, literal, pattern, first_only=True):
+    """Matches of pattern at occurrences of literal (found with str.find in the lowercased text)."""
+    found = []
+    pos = lowered.find(literal)
+    while pos != -1:
+        match = pattern.match(text, pos)
+        if match:
+            if first_only:
+                return match
+            found.append(match)
+            pos = lowered.find(literal, match.end())
+        else:
+            pos = lowered.find(literal, pos + 1)
+    return None if first_only else found
+
+def scan_memo(memo_text):
+    """
+    All extracted fields, with the same results as the extract_* functions.
+
+    Case-insensitive regex searches cannot skip ahead, so each cost a slow
+    walk over the whole memo. Here the memo is lowercased once, each field's
+    literal marker ("highest pk level:", "recursion", "agentic move", ...) is
+    located with str.find, and the compiled field pattern is only tried at
+    those positions. Fallbacks (level names, fold-back counts) run only when
+    the primary field is missing. Returns the pk_level, recursions,
+    agentic_moves, notable_features and quotes fields of analyze_memo().
+    """
+    lowered = memo_text.lower()
+    if len(lowered) != len(memo_text):
+        # a few characters lowercase to two; positions would not line up
+        return {
+            'pk_level': extract_pk_level(memo_text),
+            'recursions': extract_recursions(memo_text),
+            'agentic_moves': extract_agentic_moves(memo_text),
+            'notable_features': extract_notable_features(memo_text),
+            'quotes': extract_quotes(memo_text)
+        }
+    
+    match = _anchored(lowered, memo_text, 'highest pk level:', _HIGHEST_RE)
+    if match:
+        pk_level = f"{match.group(1)} - {match.group(2).strip()}"
+    else:
+        pk_level = next((f"{num} - {name}" for name, num in FALLBACK_LEVELS.items() if name in memo_text),
+                        "Unknown")
+    
+    match = _anchored(lowered, memo_text, 'recursion', _RECURSIONS_RE)
+    if match:
+        recursions = int(match.group(1))
+    else:
+        recursions = max(len(_anchored(lowered, lowered, 'fold', _FOLDBACK_RE, first_only=False)),
+                         len(_anchored(lowered, lowered, 'recursive', _RECURSIVE_MOVE_RE, first_only=False)))
+    
+    sections = {}
+    for key, literal in (('agentic', 'agentic move'), ('notable', 'notable feature')):
+        match = _anchored(lowered, memo_text, literal, _SECTION_RES[key])
+        sections[key] = _ITEM_RE.findall(match.group(1)) if match else []
+    
+    return {
+        'pk_level': pk_level,
+        'recursions': recursions,
+        'agentic_moves': sections['agentic'] or ["None identified"],
+        'notable_features': sections['notable'] or ["None identified"],
+        'quotes': _QUOTE_RE.findall(memo_text)[:3]
+    }
+
 def analyze_memo(memo_path):
     """Analyze a single PK-WAP memo."""
     text = memo_path.read_text(encoding='utf-8')
@@ -98,67 +234,220 @@ def analyze_memo(memo_path):
     
     return {
         'transcript_id': transcript_id,
-        'pk_level': extract_pk_level(text),
-        'recursions': extract_recursions(text),
-        'agentic_moves': extract_agentic_moves(text),
-        'notable_features': extract_notable_features(text),
-        'quotes': extract_quotes(text),
+        **scan_memo(text),
         'memo_path': str(memo_path)
     }
 
-def main():
-    memo_dir = Path("PK-WAP Memos")
-    
-    # Analyze all memos
-    results = []
-    for memo_file in sorted(memo_dir.glob("*_PK-WAP.md")):
-        print(f"Analyzing {memo_file.name}...")
-        analysis = analyze_memo(memo_file)
-        results.append(analysis)
-    
-    # Save raw results
-    with open('pkwap_analysis_results.json', 'w') as f:
-        json.dump(results, f, indent=2)
+def analysis_from_record(record, memo_path):
+    """The analyze_memo() fields, taken from a structured corpus record."""
+    level = record['highest_level']
+    quotes = [q['text'] for q in record['quotes'] if q['speaker'] == 'student']
+    quotes += [q['text'] for q in record['quotes'] if q['speaker'] != 'student']
+    return {
+        'transcript_id': record['transcript_id'],
+        'pk_level': f"{level['level']} - {level['name']}",
+        'recursions': record['recursion_count'],
+        'agentic_moves': record['agentic_moves'] or ["None identified"],
+        'notable_features': record['notable_features'] or ["None identified"],
+        'quotes': quotes[:3],
+        'memo_path': str(memo_path)
+    }
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS memos (
+    memo_path        TEXT PRIMARY KEY,
+    transcript_id    TEXT NOT NULL,
+    sha256           TEXT NOT NULL,
+    mtime_ns         INTEGER NOT NULL,
+    size             INTEGER NOT NULL,
+    source           TEXT NOT NULL,      -- 'corpus' (structured record) or 'regex'
+    pk_level         TEXT NOT NULL,
+    recursions       INTEGER NOT NULL,
+    n_agentic        INTEGER NOT NULL,
+    n_features       INTEGER NOT NULL,
+    agentic_moves    TEXT NOT NULL,      -- JSON lists
+    notable_features TEXT NOT NULL,
+    quotes           TEXT NOT NULL,
+    indexed_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS memos_pk_level ON memos (pk_level);
+"""
+
+def open_index(db_path, rebuild=False):
+    """Open (or create) the memo index; rows from another extractor version are dropped."""
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(INDEX_SCHEMA)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'extractor_version'").fetchone()
+    if rebuild or row is None or int(row[0]) != EXTRACTOR_VERSION:
+        with conn:
+            conn.execute("DELETE FROM memos")
+            conn.execute("DELETE FROM meta")
+            conn.execute("INSERT INTO meta VALUES ('extractor_version', ?)", (str(EXTRACTOR_VERSION),))
+    return conn
+
+def _meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def _analyze_in_worker(memo_path):
+    try:
+        return analyze_memo(memo_path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def iter_memo_analyses(memo_files, workers=1):
+    """Yield (memo_path, analysis, error) in input order, using a process pool when workers > 1."""
+    if workers <= 1 or len(memo_files) <= 1:
+        for memo_file in memo_files:
+            yield (memo_file, *_analyze_in_worker(memo_file))
+        return
     
-    print(f"\n✓ Analyzed {len(results)} memos")
-    print(f"✓ Results saved to pkwap_analysis_results.json")
+    workers = min(workers, len(memo_files))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(memo_files) // (workers * 4))
+        for memo_file, (analysis, error) in zip(
+                memo_files, pool.map(_analyze_in_worker, memo_files, chunksize=chunksize)):
+            yield memo_file, analysis, error
+
+def _insert_row(conn, key, sha, st, source, analysis):
+    conn.execute(
+        "INSERT OR REPLACE INTO memos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (key, analysis['transcript_id'], sha, st.st_mtime_ns, st.st_size, source,
+         canonical_level(analysis['pk_level']), analysis['recursions'],
+         len(analysis['agentic_moves']), len(analysis['notable_features']),
+         json.dumps(analysis['agentic_moves']), json.dumps(analysis['notable_features']),
+         json.dumps(analysis['quotes']), time.time()))
+
+def update_index(conn, memo_dir, workers=1):
+    """
+    Bring the index in line with the memo folder.
+
+    Memos whose size and mtime are unchanged are skipped without reading them;
+    others are hashed and only re-extracted when the hash changed, fanned out
+    over `workers` processes. When the corpus JSONL changed, regex-extracted
+    rows are re-checked against it. A memo that fails to parse is reported and
+    left out (it is retried on the next run).
+    Returns (extracted, unchanged, removed) counts.
+    """
+    corpus_path = memo_dir / CORPUS_FILE
+    try:
+        corpus_stamp = str(corpus_path.stat().st_mtime_ns)
+    except OSError:
+        corpus_stamp = ""
+    corpus_changed = corpus_stamp != (_meta(conn, "corpus_mtime_ns") or "")
+    corpus = None  # loaded only if a memo needs it
     
-    # Generate summary statistics
+    known = {path: (sha, mtime_ns, size, source) for path, sha, mtime_ns, size, source in
+             conn.execute("SELECT memo_path, sha256, mtime_ns, size, source FROM memos")}
+    seen = set()
+    pending = {}  # memo_file -> (key, sha, stat) still to be regex-extracted
+    extracted = unchanged = 0
+    with conn:
+        for memo_file in sorted(memo_dir.glob("*_PK-WAP.md")):
+            key = str(memo_file)
+            seen.add(key)
+            st = memo_file.stat()
+            old = known.get(key)
+            recheck = corpus_changed and old is not None and old[3] == 'regex'
+            if old and old[1] == st.st_mtime_ns and old[2] == st.st_size and not recheck:
+                unchanged += 1
+                continue
+            data = memo_file.read_bytes()
+            sha = hashlib.sha256(data).hexdigest()
+            if old and old[0] == sha and not recheck:
+                conn.execute("UPDATE memos SET mtime_ns = ?, size = ? WHERE memo_path = ?",
+                             (st.st_mtime_ns, st.st_size, key))
+                unchanged += 1
+                continue
+            
+            if corpus is None:
+                corpus = load_corpus(corpus_path)
+            record = corpus.get(memo_file.stem.replace('_PK-WAP', ''))
+            if record and record['memo_sha256'] == sha:
+                _insert_row(conn, key, sha, st, 'corpus', analysis_from_record(record, memo_file))
+                extracted += 1
+            else:
+                pending[memo_file] = (key, sha, st)
+        
+        for memo_file, analysis, error in iter_memo_analyses(list(pending), workers):
+            if error:
+                print(f"  ✗ {memo_file.name}: {error}")
+                continue
+            print(f"Analyzing {memo_file.name}...")
+            _insert_row(conn, *pending[memo_file][:3], 'regex', analysis)
+            extracted += 1
+        
+        removed = [path for path in known if path not in seen]
+        conn.executemany("DELETE FROM memos WHERE memo_path = ?", [(path,) for path in removed])
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('corpus_mtime_ns', ?)", (corpus_stamp,))
+    return extracted, unchanged, len(removed)
+
+def load_results(conn):
+    """All indexed memos in the analyze_memo() format, ordered by memo path."""
+    rows = conn.execute("SELECT transcript_id, pk_level, recursions, agentic_moves, notable_features, "
+                        "quotes, memo_path FROM memos ORDER BY memo_path")
+    return [{
+        'transcript_id': tid,
+        'pk_level': level,
+        'recursions': recursions,
+        'agentic_moves': json.loads(agentic),
+        'notable_features': json.loads(features),
+        'quotes': json.loads(quotes),
+        'memo_path': path
+    } for tid, level, recursions, agentic, features, quotes, path in rows]
+
+def write_csv(results, csv_path):
+    """One row per memo; list fields are joined with ' | '."""
+    fields = ['transcript_id', 'pk_level', 'recursions', 'n_agentic_moves', 'n_notable_features',
+              'agentic_moves', 'notable_features', 'quotes', 'memo_path']
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for r in results:
+            writer.writerow({
+                **r,
+                'n_agentic_moves': len(r['agentic_moves']),
+                'n_notable_features': len(r['notable_features']),
+                'agentic_moves': ' | '.join(r['agentic_moves']),
+                'notable_features': ' | '.join(r['notable_features']),
+                'quotes': ' | '.join(r['quotes'])
+            })
+
+def print_summary(conn):
+    """Summary statistics, computed in SQL over the index."""
     print("\n" + "="*70)
     print("SUMMARY STATISTICS")
     print("="*70)
     
-    # PK Level distribution
-    pk_levels = {}
-    for r in results:
-        level = r['pk_level']
-        pk_levels[level] = pk_levels.get(level, 0) + 1
+    n, avg_rec, min_rec, max_rec, total_agentic, total_features = conn.execute(
+        "SELECT COUNT(*), AVG(recursions), MIN(recursions), MAX(recursions), "
+        "SUM(n_agentic), SUM(n_features) FROM memos").fetchone()
+    if not n:
+        print("\nNo memos indexed.")
+        return
     
+    # PK Level distribution
     print("\nPK Level Distribution:")
-    for level in sorted(pk_levels.keys()):
-        count = pk_levels[level]
+    for level, count in conn.execute("SELECT pk_level, COUNT(*) FROM memos GROUP BY pk_level ORDER BY pk_level"):
         print(f"  {level}: {count} cases")
     
     # Recursion statistics
-    recursions = [r['recursions'] for r in results]
-    avg_recursions = sum(recursions) / len(recursions) if recursions else 0
     print(f"\nRecursive Movements:")
-    print(f"  Average: {avg_recursions:.1f}")
-    print(f"  Range: {min(recursions)} to {max(recursions)}")
+    print(f"  Average: {avg_rec:.1f}")
+    print(f"  Range: {min_rec} to {max_rec}")
     
     # Agentic moves frequency
-    total_agentic = sum(len(r['agentic_moves']) for r in results)
     print(f"\nAgentic Moves:")
     print(f"  Total identified: {total_agentic}")
-    print(f"  Average per case: {total_agentic/len(results):.1f}")
+    print(f"  Average per case: {total_agentic/n:.1f}")
     
     # Notable features frequency
-    total_features = sum(len(r['notable_features']) for r in results)
     print(f"\nNotable Features:")
     print(f"  Total identified: {total_features}")
-    print(f"  Average per case: {total_features/len(results):.1f}")
-    
-    # Generate detailed report
+    print(f"  Average per case: {total_features/n:.1f}")
+
+def print_details(results):
     print("\n" + "="*70)
     print("DETAILED CASE SUMMARIES")
     print("="*70)
@@ -174,5 +463,37 @@ def main():
         if r['notable_features'] and r['notable_features'][0] != "None identified":
             print(f"  Notable Features: {r['notable_features'][0][:80]}...")
 
+def main():
+    parser = argparse.ArgumentParser(description="Summarise PK-WAP memos through an incremental SQLite index.")
+    parser.add_argument("--memo-dir", type=Path, default=MEMO_DIR, help=f"Folder of *_PK-WAP.md memos (default: {MEMO_DIR})")
+    parser.add_argument("--db", type=Path, default=None, help=f"Index database (default: <memo-dir>/{INDEX_FILE})")
+    parser.add_argument("--output", type=Path, default=RESULTS_JSON, help=f"Results JSON (default: {RESULTS_JSON})")
+    parser.add_argument("--csv", type=Path, default=RESULTS_CSV, help=f"Results CSV (default: {RESULTS_CSV})")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the index and re-extract every memo")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Extract changed memos in N parallel processes (default 1 = serial). Output order is unchanged.")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    conn = open_index(args.db or args.memo_dir / INDEX_FILE, rebuild=args.rebuild)
+    extracted, unchanged, removed = update_index(conn, args.memo_dir, workers=args.workers)
+    results = load_results(conn)
+    
+    # Save raw results
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    write_csv(results, args.csv)
+    
+    print(f"\n✓ Indexed {len(results)} memos: {extracted} extracted, {unchanged} unchanged, "
+          f"{removed} removed ({time.perf_counter() - start:.3f}s)")
+    print(f"✓ Results saved to {args.output} and {args.csv}")
+    
+    # Generate summary statistics
+    print_summary(conn)
+    
+    # Generate detailed report
+    print_details(results)
+    conn.close()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+bench_screen.py — timing suite for the screening engine.
+
+Generates the synthetic corpus from synthetic.py (same bytes on every commit),
+then times:
+  tokens.<shape>        line_token_count() over every line of the transcript
+  classify.<shape>      classify_line_initial() over every line
+  instructions.<shape>  detect_instruction_block() over every page
+  screen.<shape>        screen_file() end to end, with per-stage --profile timings
+  recount.<shape>       recount_from_annot.recount_file() on the annotated output
+  e2e.screen            pk_screen_v2_2.py --annotate over the whole corpus (subprocess)
+  e2e.recount           recount_from_annot.py over that run (subprocess)
+
+Each timing is the best of --repeat runs. Results (plus commit, Python version
+and the word counts each shape produced, so rule changes show up next to speed
+changes) are saved as JSON; --compare flags anything slower than the baseline
+by more than --threshold and exits 1.
+
+Usage:
+  python3 bench_screen.py                                   # writes results/<commit>.json
+  python3 bench_screen.py --quick --out /tmp/new.json
+  python3 bench_screen.py --compare results/abc1234.json    # exit 1 on regression
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+SCRIPTS = HERE.parent
+sys.path.insert(0, str(SCRIPTS))
+sys.path.insert(0, str(HERE))
+
+import pk_screen_v2_2 as pk
+import recount_from_annot
+import synthetic
+
+RESULTS_DIR = HERE / "results"
+QUICK_PAGES = 40
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "."], cwd=SCRIPTS,
+                               capture_output=True, text=True).stdout.strip()
+        return sha, bool(dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def transcript_pages(path):
+    _skipped, pages = pk.iter_transcript_pages(path)
+    return list(pages)
+
+
+def bench_shape(path, shape, annot_dir, repeat, results, counts):
+    pages = transcript_pages(path)
+    lines = [ln for page in pages for ln in page]
+
+    def run_tokens():
+        for ln in lines:
+            pk.line_token_count(ln)
+
+    def run_classify():
+        prev = None
+        for ln in lines:
+            res = pk.classify_line_initial(ln, prev, False)
+            if isinstance(res[0], str) and res[0] in {"ai", "student"}:
+                prev = res[0]
+
+    def run_instructions():
+        for page in pages:
+            pk.detect_instruction_block(page)
+
+    for name, fn, n in (("tokens", run_tokens, len(lines)),
+                        ("classify", run_classify, len(lines)),
+                        ("instructions", run_instructions, len(pages))):
+        sec, _ = best_of(fn, repeat)
+        results[f"{name}.{shape}"] = {"seconds": sec, "items": n}
+
+    sec, rec = best_of(lambda: pk.screen_file(path, annot_dir, profile=True), repeat)
+    results[f"screen.{shape}"] = {
+        "seconds": sec,
+        "items": len(pages),
+        "stages": {st: rec["timings"].get(st, [0.0, 0])[0] for st in pk.PROFILE_STAGES},
+    }
+    counts[shape] = {k: rec[k] for k in ("student_words", "ai_words", "unknown_words", "pct_student")}
+
+    annot = annot_dir / f"{path.stem}__annotated.txt"
+    sec, rc = best_of(lambda: recount_from_annot.recount_file(str(annot)), repeat)
+    results[f"recount.{shape}"] = {"seconds": sec, "items": len(lines)}
+    counts[shape]["recount_pct_student"] = rc["pct_student"]
+
+
+def bench_e2e(corpus, workdir, repeat, results):
+    run_dir = workdir / "e2e_run"
+    screen_cmd = [sys.executable, str(SCRIPTS / "pk_screen_v2_2.py"), "--input", str(corpus),
+                  "--outdir", str(run_dir), "--annotate", "--force"]
+    recount_cmd = [sys.executable, str(SCRIPTS / "recount_from_annot.py"), "--outdir", str(run_dir)]
+    for name, cmd in (("e2e.screen", screen_cmd), ("e2e.recount", recount_cmd)):
+        sec, _ = best_of(lambda: subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL), repeat)
+        results[name] = {"seconds": sec, "items": len(list(corpus.glob("*.txt")))}
+
+
+def compare(current, baseline, threshold):
+    """Print current/baseline ratios; return the names that got slower than threshold."""
+    regressions = []
+    base = baseline["results"]
+    print(f"\nCompared with {baseline['meta'].get('commit', '?')} (threshold {threshold:.2f}x):")
+    for name, res in current["results"].items():
+        if name not in base or not base[name]["seconds"]:
+            continue
+        ratio = res["seconds"] / base[name]["seconds"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        print(f"  {name:<26}{base[name]['seconds']*1000:>10.1f} ms{res['seconds']*1000:>10.1f} ms{ratio:>7.2f}x{flag}")
+    if current["meta"]["pages"] != baseline["meta"].get("pages"):
+        print("  note: corpus sizes differ (--quick vs full); ratios are not meaningful")
+    if current["counts"] != baseline.get("counts"):
+        print("  note: word counts differ from the baseline (counting rules changed)")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the pk_screen_v2_2 screening engine on synthetic transcripts.")
+    ap.add_argument("--shapes", nargs="+", choices=synthetic.SHAPES, default=synthetic.SHAPES)
+    ap.add_argument("--quick", action="store_true", help=f"{QUICK_PAGES} pages per transcript instead of the defaults")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per timing; the best is kept (default 3)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-e2e", action="store_true", help="Skip the subprocess end-to-end runs")
+    ap.add_argument("--out", default=None, help="Results JSON (default results/<commit>.json)")
+    ap.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio counted as a regression (default 1.25)")
+    args = ap.parse_args()
+
+    commit, dirty = git_commit()
+    pages = {s: (QUICK_PAGES if args.quick else synthetic.DEFAULT_PAGES[s]) for s in args.shapes}
+    results, counts = {}, {}
+
+    print("=" * 90)
+    print(f"SCREENING BENCHMARKS  commit {commit}{' (dirty)' if dirty else ''}  repeat={args.repeat}")
+    print("=" * 90)
+
+    with tempfile.TemporaryDirectory(prefix="pk_bench_") as tmp:
+        workdir = Path(tmp)
+        corpus = workdir / "corpus"
+        annot_dir = workdir / "annotated"
+        annot_dir.mkdir()
+        corpus.mkdir()
+        paths = []
+        for k, shape in enumerate(args.shapes):
+            path = corpus / f"P{k}-bench-{shape}.txt"
+            path.write_text(synthetic.make_transcript(shape, pages[shape], args.seed), encoding="utf-8")
+            paths.append(path)
+
+        for shape, path in zip(args.shapes, paths):
+            print(f"  {shape:<13} {path.stat().st_size/1024:8.1f} KB, {pages[shape]} pages")
+            bench_shape(path, shape, annot_dir, args.repeat, results, counts)
+        if not args.no_e2e:
+            bench_e2e(corpus, workdir, args.repeat, results)
+
+    print(f"\n  {'benchmark':<26}{'ms':>10}{'items':>10}{'us/item':>10}")
+    for name, res in results.items():
+        per = 1e6 * res["seconds"] / res["items"] if res["items"] else 0.0
+        print(f"  {name:<26}{res['seconds']*1000:>10.1f}{res['items']:>10}{per:>10.2f}")
+
+    data = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "pages": pages,
+        },
+        "results": results,
+        "counts": counts,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{commit}{'-dirty' if dirty else ''}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"\nSaved {out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(data, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+synthetic.py — seeded synthetic transcripts for the screening benchmarks.
+
+Each shape stresses one part of pk_screen_v2_2.py:
+  cjk           long CJK runs mixed with Latin text (token_counts CJK path)
+  math          formula-dense lines (math-char tokens, apostrophes, URLs)
+  instructions  every page opens with a long instruction block (detect_instruction_block)
+  my_answer     many inline "My answer:" splits (classify_line_initial)
+  pages         thousands of short pages with "Page N" markers (pagination, per-page flush)
+  mixed         a blend of all of the above with boilerplate up front
+
+The same (shape, pages, seed) always produces the same bytes, so timings from
+different commits are measured on identical input.
+
+Usage:
+  python3 synthetic.py --outdir /tmp/bench_corpus --pages 200
+"""
+
+import argparse
+import random
+from pathlib import Path
+
+SHAPES = ["cjk", "math", "instructions", "my_answer", "pages", "mixed"]
+
+# Default page count per shape, chosen so each file is roughly 0.2–1 MB
+DEFAULT_PAGES = {
+    "cjk": 300,
+    "math": 300,
+    "instructions": 300,
+    "my_answer": 300,
+    "pages": 5000,
+    "mixed": 400,
+}
+
+WORDS = ("the series converges when x is small so we keep the first few terms and "
+         "compare the error bound with the next term of the polynomial approximation "
+         "around zero because derivatives repeat for sine and cosine").split()
+CJK_CHUNKS = ["泰勒级数是一个很好的主题", "导数", "多项式近似", "テイラー展開", "収束半径",
+              "테일러 급수", "误差估计", "麦克劳林级数"]
+MATH_BITS = ["f(x)=sin(x)", "x^3/6", "e^x = 1 + x + x^2/2! + ...", "|R_n(x)| ≤ M·|x|^(n+1)/(n+1)!",
+             "∑_{n=0}^{∞} x^n/n!", "f''(0)", "1/(1-x)", "≈ 0.8415", "±0.001", "√2", "→ 0",
+             "don't", "it's", "www.example.com/taylor", "me@example.org"]
+INSTRUCTION_LINES = [
+    "You are a personality-based AI teacher generator.",
+    "Your goal is to teach Taylor series through a guided activity.",
+    "The Activity (to be revealed step by step)",
+    "STEP 1: PERSONALITY TEST",
+    "Temporary AI profiler: ask five questions before teaching.",
+    "You are an expert tutor who never gives the answer directly.",
+]
+AI_LABELS = ["AI:", "ChatGPT:", "Assistant:", "Tutor:", "GPT:"]
+STUDENT_LABELS = ["Student:", "User:", "Me:", "S:"]
+AI_OPENERS = ["Sure, ", "Great question! ", "Let's ", "Certainly. ", "", "", ""]
+BOILERPLATE = [
+    "You are a personality-based AI teacher generator",
+    "STEP 1: PERSONALITY TEST",
+    "Q1: Do you prefer stories or formulas?",
+    "A: stories",
+    "Internal teacher profile built",
+    "Let's rewind to 1715, when Brook Taylor published his method.",
+]
+
+
+def _words(rng, lo, hi):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+def _cjk_line(rng):
+    parts = []
+    for _ in range(rng.randint(3, 8)):
+        parts.append(rng.choice(CJK_CHUNKS) * rng.randint(1, 4))
+        if rng.random() < 0.5:
+            parts.append(_words(rng, 1, 4))
+    return " ".join(parts)
+
+
+def _math_line(rng):
+    parts = []
+    for _ in range(rng.randint(4, 10)):
+        parts.append(rng.choice(MATH_BITS) if rng.random() < 0.6 else _words(rng, 1, 3))
+    return " ".join(parts)
+
+
+def _ai(rng, body):
+    return f"{rng.choice(AI_LABELS)} {rng.choice(AI_OPENERS)}{body}"
+
+
+def _student(rng, body):
+    return f"{rng.choice(STUDENT_LABELS)} {body}"
+
+
+def _exchange(rng, shape):
+    """A few lines of AI/student dialogue in the style of the given shape."""
+    body = {
+        "cjk": _cjk_line,
+        "math": _math_line,
+    }.get(shape, lambda r: _words(r, 6, 30))
+    lines = []
+    for _ in range(rng.randint(2, 5)):
+        roll = rng.random()
+        if shape == "my_answer" or (shape == "mixed" and roll < 0.2):
+            lines.append(f"{_words(rng, 4, 12)}? My answer: {body(rng)}")
+        elif roll < 0.45:
+            lines.append(_ai(rng, body(rng)))
+        elif roll < 0.8:
+            lines.append(_student(rng, body(rng)))
+        elif roll < 0.9:
+            lines.append(body(rng))  # unlabeled continuation
+        else:
+            lines.append("")
+    return lines
+
+
+def make_transcript(shape: str, pages: int, seed: int = 0) -> str:
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape {shape!r}; choose from {', '.join(SHAPES)}")
+    rng = random.Random(f"{shape}:{pages}:{seed}")
+    out = []
+    if shape == "mixed":
+        out.extend(BOILERPLATE)
+    for p in range(1, pages + 1):
+        if p > 1:
+            out.append(f"Page {p}" if shape != "mixed" or p % 2 else f"--- Page {p} ---")
+        if shape == "instructions" or (shape == "mixed" and rng.random() < 0.2):
+            out.extend(rng.choice(INSTRUCTION_LINES) for _ in range(rng.randint(8, 20)))
+        n_exchanges = 1 if shape == "pages" else rng.randint(3, 8)
+        page_shape = rng.choice(SHAPES[:4]) if shape == "mixed" else shape
+        for _ in range(n_exchanges):
+            out.extend(_exchange(rng, page_shape))
+    return "\n".join(out) + "\n"
+
+
+def write_corpus(outdir: Path, shapes=SHAPES, pages=None, seed: int = 0):
+    """Write one P<k>-bench-<shape>.txt per shape; returns the list of paths.
+
+    pages overrides DEFAULT_PAGES for every shape when given.
+    """
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for k, shape in enumerate(shapes):
+        path = outdir / f"P{k}-bench-{shape}.txt"
+        path.write_text(make_transcript(shape, pages or DEFAULT_PAGES[shape], seed), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write synthetic benchmark transcripts.")
+    ap.add_argument("--outdir", required=True, help="Folder to write .txt transcripts into")
+    ap.add_argument("--shapes", nargs="+", choices=SHAPES, default=SHAPES)
+    ap.add_argument("--pages", type=int, default=None, help="Pages per transcript (default: per-shape)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    for path in write_corpus(Path(args.outdir).expanduser(), args.shapes, args.pages, args.seed):
+        print(f"  {path.name:<32} {path.stat().st_size/1024:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+cache_utils.py — helpers shared by the on-disk caches.
+
+docx_cache.py (extracted .docx text), llm_cache.py (chat-completion responses)
+and pkwap_vision_analyzer.py (downscaled page images) each keep a folder of
+files sharded as <root>/<key[:2]>/<key>.<ext> under a byte budget. Reading an
+entry touches its mtime, so the oldest mtimes are the least recently used.
+"""
+
+from pathlib import Path
+
+
+def evict(root: Path, max_bytes: int, pattern) -> int:
+    """
+    Delete least recently used entries until the cache fits in max_bytes. Returns bytes freed.
+
+    pattern is a glob relative to root, or a tuple of globs whose entries share
+    the one budget.
+    """
+    entries = []
+    total = 0
+    for glob in ((pattern,) if isinstance(pattern, str) else pattern):
+        for p in root.glob(glob):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, p))
+            total += st.st_size
+    freed = 0
+    if total <= max_bytes:
+        return 0
+    for _mtime, size, p in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        try:
+            p.unlink()
+            freed += size
+        except OSError:
+            pass
+    return freed
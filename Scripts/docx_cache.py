@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+docx_cache.py — shared on-disk cache of plaintext extracted from .docx transcripts.
+
+python-docx is slow to import and slower to parse, and every script in the
+pipeline (pk_screen_v2_2.py, pkwap_analyzer.py, pkwap_vision_analyzer.py,
+batch_rows_v3.py) re-reads the same transcripts. read_docx_text() returns
+"\n".join(paragraph.text) exactly as those loaders did, but stores the result
+keyed by (absolute path, mtime, size) so a .docx is only parsed again after it
+changes. python-docx is imported only on a cache miss.
+
+Entries are plain UTF-8 files; the least recently used ones are evicted once the
+cache exceeds its byte budget.
+
+Two extraction engines are available:
+  python-docx   docx.Document(path).paragraphs (default)
+  xml           streams word/document.xml out of the zip with xml.etree.iterparse;
+                no python-docx import and no full object model; validate_docx_text.py
+                checks it against python-docx on a fixture and on the corpus
+
+Environment:
+  DOCX_CACHE_DIR        cache folder (default ~/.cache/tea-pkwap/docx_text); "off" disables
+  DOCX_CACHE_MAX_MB     total size budget in MB (default 256)
+  DOCX_ENGINE           python-docx | xml (default python-docx); scripts set it from --docx-engine
+"""
+
+import hashlib
+import os
+import zipfile
+from pathlib import Path
+from typing import Iterator, Optional
+from xml.etree.ElementTree import iterparse
+
+from cache_utils import evict
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "tea-pkwap" / "docx_text"
+DEFAULT_MAX_MB = 256.0
+ENTRY_GLOB = "*/*.txt"
+
+
+def cache_dir() -> Optional[Path]:
+    """Configured cache folder, or None when caching is disabled."""
+    env = os.environ.get("DOCX_CACHE_DIR", "").strip()
+    if env.lower() in {"off", "0", "none"}:
+        return None
+    return Path(env).expanduser() if env else DEFAULT_CACHE_DIR
+
+
+def max_cache_bytes() -> int:
+    try:
+        mb = float(os.environ.get("DOCX_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    except ValueError:
+        mb = DEFAULT_MAX_MB
+    return int(mb * 1024 * 1024)
+
+
+def cache_key(path: Path) -> str:
+    """Key for the current version of path: absolute path + mtime + size."""
+    path = Path(path).resolve()
+    st = path.stat()
+    ident = f"{path}\0{st.st_mtime_ns}\0{st.st_size}"
+    return hashlib.sha256(ident.encode("utf-8", "surrogateescape")).hexdigest()
+
+
+def parse_docx(path: Path) -> str:
+    """Extract paragraph text with python-docx (raises ImportError if it is missing)."""
+    from docx import Document  # imported lazily: slow, and only needed on a miss
+    return "\n".join(p.text for p in Document(str(path)).paragraphs)
+
+
+# ---------- python-docx-free extraction ----------
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY, _W_P, _W_R, _W_HYPERLINK = W_NS + "body", W_NS + "p", W_NS + "r", W_NS + "hyperlink"
+_W_T, _W_TAB, _W_PTAB = W_NS + "t", W_NS + "tab", W_NS + "ptab"
+_W_BR, _W_CR, _W_NBH = W_NS + "br", W_NS + "cr", W_NS + "noBreakHyphen"
+_W_TYPE = W_NS + "type"
+
+
+def iter_docx_paragraphs(path: Path) -> Iterator[str]:
+    """Yield the text of each body paragraph, matching python-docx (1.x) Paragraph.text.
+
+    Like Document.paragraphs, only direct w:body children are paragraphs (table
+    cells are skipped), and text comes from w:r runs directly under the paragraph
+    or under a w:hyperlink: w:t text, w:tab/w:ptab -> "\t", w:cr and
+    text-wrapping w:br -> "\n", w:noBreakHyphen -> "-".
+    """
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as xml:
+        stack = []
+        parts = []
+        for event, elem in iterparse(xml, events=("start", "end")):
+            if event == "start":
+                stack.append(elem.tag)
+                continue
+            stack.pop()
+            tag = elem.tag
+            depth = len(stack)  # parent is stack[-1]
+            if tag == _W_P and depth == 2 and stack[1] == _W_BODY:
+                yield "".join(parts)
+                parts = []
+                elem.clear()
+                continue
+            if depth < 4 or stack[-1] != _W_R or stack[1] != _W_BODY:
+                if depth == 2:
+                    elem.clear()  # body-level tables etc.: not part of Document.paragraphs
+                continue
+            # run child: w:body/w:p/w:r/<x> or w:body/w:p/w:hyperlink/w:r/<x>
+            if not ((depth == 4 and stack[2] == _W_P)
+                    or (depth == 5 and stack[2] == _W_P and stack[3] == _W_HYPERLINK)):
+                continue
+            if tag == _W_T:
+                parts.append(elem.text or "")
+            elif tag == _W_TAB or tag == _W_PTAB:
+                parts.append("\t")
+            elif tag == _W_CR:
+                parts.append("\n")
+            elif tag == _W_BR:
+                if elem.get(_W_TYPE, "textWrapping") == "textWrapping":
+                    parts.append("\n")
+            elif tag == _W_NBH:
+                parts.append("-")
+
+
+def parse_docx_xml(path: Path) -> str:
+    """Same output as parse_docx(), without importing python-docx."""
+    return "\n".join(iter_docx_paragraphs(path))
+
+
+DOCX_ENGINES = {"python-docx": parse_docx, "xml": parse_docx_xml}
+
+
+def docx_engine() -> str:
+    name = os.environ.get("DOCX_ENGINE", "python-docx").strip() or "python-docx"
+    if name not in DOCX_ENGINES:
+        raise ValueError(f"Unknown DOCX_ENGINE {name!r}; choose from {', '.join(DOCX_ENGINES)}")
+    return name
+
+
+def set_docx_engine(name: Optional[str]) -> None:
+    """Select the engine for this process and any worker processes it starts."""
+    if name:
+        if name not in DOCX_ENGINES:
+            raise ValueError(f"Unknown docx engine {name!r}; choose from {', '.join(DOCX_ENGINES)}")
+        os.environ["DOCX_ENGINE"] = name
+
+
+def read_docx_text(path: Path, extractor=None) -> str:
+    """Return the plaintext of a .docx, parsing it only if the cached copy is stale.
+
+    extractor(path) -> str overrides the DOCX_ENGINE choice; non-default extractors
+    become part of the key so engines never share entries.
+    """
+    extractor = extractor or DOCX_ENGINES[docx_engine()]
+    root = cache_dir()
+    if root is None:
+        return extractor(path)
+
+    key = cache_key(path)
+    name = getattr(extractor, "__name__", "extractor")
+    if extractor is not parse_docx:
+        key = hashlib.sha256(f"{key}\0{name}".encode("utf-8")).hexdigest()
+    entry = root / key[:2] / f"{key}.txt"
+    try:
+        text = entry.read_text(encoding="utf-8")
+        os.utime(entry)  # mark as recently used
+        return text
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    text = extractor(path)
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, entry)
+        evict(root, max_cache_bytes(), ENTRY_GLOB)
+    except OSError:
+        pass  # an unwritable cache must never break loading
+    return text
+
+
+def clear() -> None:
+    """Remove every cached entry."""
+    root = cache_dir()
+    if root is not None and root.exists():
+        evict(root, 0, ENTRY_GLOB)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Inspect or clear the shared .docx text cache.")
+    ap.add_argument("--clear", action="store_true", help="Delete all cached entries")
+    args = ap.parse_args()
+    root = cache_dir()
+    if root is None:
+        print("docx cache disabled (DOCX_CACHE_DIR=off)")
+    elif args.clear:
+        clear()
+        print(f"Cleared {root}")
+    else:
+        files = list(root.glob("*/*.txt")) if root.exists() else []
+        size = sum(f.stat().st_size for f in files)
+        print(f"{root}: {len(files)} entries, {size/1024/1024:.1f} MB (limit {max_cache_bytes()/1024/1024:.0f} MB)")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+llm_cache.py — content-addressed on-disk cache of chat-completion responses.
+
+pkwap_analyzer.py, pkwap_vision_analyzer.py and Scripts/batch_rows*.py send the
+same requests again whenever a run is repeated (e.g. after a crash). A response
+is stored under sha256 of (model, temperature, max_tokens, endpoint, messages),
+where endpoint is the resolved API base URL, so a stub server or another proxy
+never shares entries with the real API; image parts are base64 data URLs inside
+the messages, so the image bytes are part of the key. A repeated request is
+answered from disk.
+
+Entries are small JSON files sharded as <root>/<key[:2]>/<key>.json; the least
+recently used ones are evicted once the cache exceeds its byte budget (checked
+on the first store in a process and then every EVICT_EVERY stores).
+
+Modes (--cache-mode in each script, or LLM_CACHE_MODE):
+  auto    read at temperature 0, off otherwise, so repeated runs and temperature
+          sweeps keep sampling fresh completions (default)
+  read    serve cached responses; call the API and store the result on a miss
+  write   always call the API and overwrite the cached response (refresh)
+  off     neither read nor write
+
+Environment:
+  LLM_CACHE_DIR         cache folder (default ~/.cache/tea-pkwap/llm_responses)
+  LLM_CACHE_MAX_MB      total size budget in MB (default 512)
+  LLM_CACHE_MODE        auto | read | write | off (default auto)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from cache_utils import evict
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "tea-pkwap" / "llm_responses"
+DEFAULT_MAX_MB = 512.0
+CACHE_MODES = ("auto", "read", "write", "off")
+ENTRY_GLOB = "*/*.json"
+EVICT_EVERY = 100  # stores between eviction scans of the whole cache
+
+_stats_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+_stores = 0
+
+
+def cache_dir() -> Path:
+    env = os.environ.get("LLM_CACHE_DIR", "").strip()
+    return Path(env).expanduser() if env else DEFAULT_CACHE_DIR
+
+
+def max_cache_bytes() -> int:
+    try:
+        mb = float(os.environ.get("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    except ValueError:
+        mb = DEFAULT_MAX_MB
+    return int(mb * 1024 * 1024)
+
+
+def cache_mode() -> str:
+    mode = os.environ.get("LLM_CACHE_MODE", "auto").strip().lower() or "auto"
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown LLM_CACHE_MODE {mode!r}; choose from {', '.join(CACHE_MODES)}")
+    return mode
+
+
+def set_cache_mode(mode: Optional[str]) -> None:
+    """Select the mode for this process (and any threads/processes it starts)."""
+    if mode:
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; choose from {', '.join(CACHE_MODES)}")
+        os.environ["LLM_CACHE_MODE"] = mode
+
+
+def request_key(model: str, messages: List[dict], temperature: float, max_tokens: int,
+                endpoint: str = "") -> str:
+    """sha256 of the request fields that determine the response (endpoint: the API base URL)."""
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "max_tokens": max_tokens,
+         "endpoint": endpoint, "messages": messages},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _count(field: str) -> None:
+    with _stats_lock:
+        stats[field] += 1
+
+
+def _store_due() -> bool:
+    """True on the first store in this process and then every EVICT_EVERY stores."""
+    global _stores
+    with _stats_lock:
+        _stores += 1
+        return (_stores - 1) % EVICT_EVERY == 0
+
+
+def cached_completion(create: Callable[[], str], *, model: str, messages: List[dict],
+                      temperature: float, max_tokens: int, endpoint: str = "") -> str:
+    """Return create()'s response text, via the cache according to cache_mode().
+
+    create() performs the actual API call; it is only invoked on a miss (or in
+    write mode). Failed calls raise and are never cached. endpoint is the
+    resolved base URL the request goes to (see llm_client.resolve_base_url).
+    """
+    mode = cache_mode()
+    if mode == "auto":
+        mode = "read" if temperature == 0 else "off"
+    if mode == "off":
+        return create()
+
+    root = cache_dir()
+    key = request_key(model, messages, temperature, max_tokens, endpoint)
+    entry = root / key[:2] / f"{key}.json"
+    if mode == "read":
+        try:
+            content = json.loads(entry.read_text(encoding="utf-8"))["content"]
+            os.utime(entry)  # mark as recently used
+            _count("hits")
+            return content
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    _count("misses")
+    content = create()
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"model": model, "created": time.time(), "content": content},
+                                  ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, entry)
+        if _store_due():
+            evict(root, max_cache_bytes(), ENTRY_GLOB)
+    except OSError:
+        pass  # an unwritable cache must never lose a paid-for response
+    return content
+
+
+def clear() -> None:
+    """Remove every cached response."""
+    root = cache_dir()
+    if root.exists():
+        evict(root, 0, ENTRY_GLOB)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Inspect or clear the LLM response cache.")
+    ap.add_argument("--clear", action="store_true", help="Delete all cached responses")
+    args = ap.parse_args()
+    root = cache_dir()
+    if args.clear:
+        clear()
+        print(f"Cleared {root}")
+    else:
+        files = list(root.glob(ENTRY_GLOB)) if root.exists() else []
+        size = sum(f.stat().st_size for f in files)
+        print(f"{root}: {len(files)} responses, {size/1024/1024:.1f} MB (limit {max_cache_bytes()/1024/1024:.0f} MB)")
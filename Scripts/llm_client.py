@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+llm_client.py — one shared OpenAI client (and keep-alive connection pool) per endpoint.
+
+pkwap_analyzer.py and pkwap_vision_analyzer.py used to build a new OpenAI(...)
+for every call, paying client construction plus a fresh TCP/TLS handshake per
+request. get_client() creates the client lazily on first use and returns the
+same instance for every later call with the same (base_url, api_key), from any
+thread; its httpx pool keeps connections alive between requests.
+
+track_request() measures one API call (latency, and how many new TCP
+connections it had to open) and record_usage() adds its token usage, including
+the prompt tokens the provider served from its prefix cache, so callers can put
+those numbers in their logs.
+
+Environment (the scripts set these from --timeout / --connect-timeout):
+  LLM_TIMEOUT           read/write timeout per request in seconds (default 600)
+  LLM_CONNECT_TIMEOUT   connect timeout in seconds (default 10)
+  LLM_MAX_CONNECTIONS   pool size per endpoint (default 16)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+DEFAULT_TIMEOUT = 600.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTIONS = 16
+KEEPALIVE_EXPIRY = 120.0  # seconds an idle pooled connection is kept
+OPENAI_DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+_clients = {}
+_clients_lock = threading.Lock()
+_local = threading.local()
+
+_stats_lock = threading.Lock()
+stats = {"clients": 0, "requests": 0, "connections": 0, "latency_seconds": 0.0,
+         "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def set_timeouts(timeout: Optional[float] = None, connect_timeout: Optional[float] = None) -> None:
+    """Set timeouts for clients created from now on (in this process and its children)."""
+    if timeout is not None:
+        os.environ["LLM_TIMEOUT"] = str(timeout)
+    if connect_timeout is not None:
+        os.environ["LLM_CONNECT_TIMEOUT"] = str(connect_timeout)
+
+
+def _on_trace(event: str, info) -> None:
+    # httpcore trace hook: fires once per new TCP connection, not for pooled reuse
+    if event == "connection.connect_tcp.complete":
+        with _stats_lock:
+            stats["connections"] += 1
+        req = getattr(_local, "current", None)
+        if req is not None:
+            req["connections_opened"] += 1
+
+
+def _attach_trace(request) -> None:
+    request.extensions["trace"] = _on_trace
+
+
+def resolve_base_url(base_url: Optional[str] = None) -> str:
+    """The URL requests go to: base_url, else OPENAI_BASE_URL, else the OpenAI API (as the SDK resolves it)."""
+    return (base_url or os.environ.get("OPENAI_BASE_URL") or OPENAI_DEFAULT_BASE_URL).rstrip("/")
+
+
+def get_client(base_url: Optional[str] = None, api_key: Optional[str] = None):
+    """Shared OpenAI client for (base_url, api_key); None falls back to OPENAI_BASE_URL / OPENAI_API_KEY."""
+    base_url = base_url or os.environ.get("OPENAI_BASE_URL") or None
+    api_key = api_key or os.environ.get("OPENAI_API_KEY")
+    key = (base_url, api_key)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            from openai import OpenAI
+
+            timeout = httpx.Timeout(_env_float("LLM_TIMEOUT", DEFAULT_TIMEOUT),
+                                    connect=_env_float("LLM_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT))
+            pool = int(_env_float("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+            http_client = httpx.Client(
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=pool, max_keepalive_connections=pool,
+                                    keepalive_expiry=KEEPALIVE_EXPIRY),
+                event_hooks={"request": [_attach_trace]},
+            )
+            client = OpenAI(base_url=base_url, api_key=api_key, timeout=timeout, http_client=http_client)
+            _clients[key] = client
+            with _stats_lock:
+                stats["clients"] += 1
+    return client
+
+
+@contextmanager
+def track_request():
+    """Time one API call made on this thread; the result is kept for take_last_request()."""
+    req = {"latency_seconds": 0.0, "connections_opened": 0,
+           "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0}
+    _local.current = req
+    t0 = time.perf_counter()
+    try:
+        yield req
+    finally:
+        req["latency_seconds"] = time.perf_counter() - t0
+        _local.current = None
+        _local.last = req
+        with _stats_lock:
+            stats["requests"] += 1
+            stats["latency_seconds"] += req["latency_seconds"]
+
+
+def record_usage(req: dict, response) -> None:
+    """Copy token usage (prompt, provider-cached prompt, completion) from a chat response into req."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    counts = {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "cached_prompt_tokens": (getattr(details, "cached_tokens", 0) or 0) if details else 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+    }
+    req.update(counts)
+    with _stats_lock:
+        for k, v in counts.items():
+            stats[k] += v
+
+
+def take_last_request() -> Optional[dict]:
+    """Pop the measurements of this thread's last tracked call (None if none since the last pop)."""
+    req = getattr(_local, "last", None)
+    _local.last = None
+    return req
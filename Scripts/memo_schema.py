@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+memo_schema.py — structured JSON summary of a PK-WAP memo.
+
+pkwap_analyzer.py asks the model to end each memo with a fenced ```json block
+holding the memo's key findings (highest PK level, per-layer evidence,
+recursion count, quotes, word-count table, agentic moves, notable features).
+The block is split off the markdown, validated here, saved as a sidecar
+(<id>_PK-WAP.json) and appended to the corpus file pkwap_memos.jsonl, so
+analyze_pkwap_memos.py can read one file instead of regex-scanning every memo.
+
+The corpus file is append-only: a regenerated memo adds a new line, and readers
+keep the last record per transcript_id (load_corpus). Each record carries the
+sha256 of the markdown it describes, so a stale record (memo edited or
+regenerated without a valid block) can be detected.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA_VERSION = 1
+CORPUS_FILE = "pkwap_memos.jsonl"
+
+PK_LAYERS = [
+    "Primitive Knowing",
+    "Image Making",
+    "Image Having",
+    "Property Noticing",
+    "Formalising",
+    "Observing",
+    "Structuring",
+    "Inventising",
+]
+_LAYER_KEYS = {re.sub(r"[^a-z]", "", name.lower()): i for i, name in enumerate(PK_LAYERS, 1)}
+_LAYER_KEYS["formalizing"] = 5
+
+SPEAKERS = ("student", "ai")
+
+# The summary object; SCHEMA_PROMPT asks for it at the end of every memo
+SCHEMA_SPEC = """{
+  "highest_level": {"level": <1-8>, "name": "<PK layer name>"},
+  "layers": [{"layer": "<PK layer name>", "level": <1-8>, "evidence": ["<short evidence with page number>", ...]}, ...],
+  "recursion_count": <number of folding-back / recursive movements>,
+  "quotes": [{"speaker": "student" or "ai", "text": "<verbatim quote>", "page": <page number or null>}, ...],
+  "word_counts": {"rows": [{"page": <page>, "student_words": <int>, "ai_words": <int>, "pct_student": <number>}, ...],
+                  "total": {"student_words": <int>, "ai_words": <int>, "pct_student": <number>}},
+  "agentic_moves": ["<one line per agentic move>", ...],
+  "notable_features": ["<one line per notable feature>", ...]
+}
+PK layer names: Primitive Knowing (1), Image Making (2), Image Having (3), Property Noticing (4), Formalising (5), Observing (6), Structuring (7), Inventising (8). List only layers with evidence in "layers"."""
+
+SCHEMA_PROMPT = f"""After the memo, append a machine-readable summary as the LAST thing in your answer: one fenced ```json code block (nothing after it) containing a single JSON object with exactly these keys:
+{SCHEMA_SPEC}
+The JSON must agree with the memo."""
+
+_JSON_BLOCK_RE = re.compile(r"```json[ \t]*\n(.*?)\n?```[ \t]*\Z", re.DOTALL | re.IGNORECASE)
+
+
+def layer_level(name) -> Optional[int]:
+    """1-8 for a PK layer name (spacing, hyphens and -ise/-ize spelling ignored)."""
+    if not isinstance(name, str):
+        return None
+    return _LAYER_KEYS.get(re.sub(r"[^a-z]", "", name.lower()))
+
+
+def split_memo(content: str) -> Tuple[str, Optional[str]]:
+    """Split a model answer into (markdown memo, raw JSON text or None if there is no trailing block)."""
+    match = _JSON_BLOCK_RE.search(content.rstrip())
+    if not match:
+        return content, None
+    return content[:match.start()].rstrip() + "\n", match.group(1)
+
+
+def _int(value, field, errors, minimum=0):
+    if (isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value)
+            or value != int(value) or value < minimum):
+        errors.append(f"{field}: expected an integer >= {minimum}, got {value!r}")
+        return None
+    return int(value)
+
+
+def _num(value, field, errors):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        errors.append(f"{field}: expected a number, got {value!r}")
+        return None
+    return float(value)
+
+
+def _strings(value, field, errors) -> List[str]:
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        errors.append(f"{field}: expected a list of strings")
+        return []
+    return [v.strip() for v in value if v.strip()]
+
+
+def _level(value, field, errors) -> Optional[dict]:
+    """{"level", "name"} with the name canonicalised; level and name must agree."""
+    if not isinstance(value, dict):
+        errors.append(f"{field}: expected an object with level and name")
+        return None
+    level = layer_level(value.get("name"))
+    given = value.get("level")
+    if level is None:
+        errors.append(f"{field}.name: unknown PK layer {value.get('name')!r}")
+        return None
+    if given is not None and given != level:
+        errors.append(f"{field}: level {given!r} does not match layer {PK_LAYERS[level - 1]}")
+    return {"level": level, "name": PK_LAYERS[level - 1]}
+
+
+def _word_counts(value, errors) -> Optional[dict]:
+    if not isinstance(value, dict) or not isinstance(value.get("rows"), list):
+        errors.append("word_counts: expected an object with rows and total")
+        return None
+    rows = []
+    for i, row in enumerate(value["rows"]):
+        field = f"word_counts.rows[{i}]"
+        if not isinstance(row, dict):
+            errors.append(f"{field}: expected an object")
+            continue
+        rows.append({
+            "page": row.get("page"),
+            "student_words": _int(row.get("student_words"), f"{field}.student_words", errors),
+            "ai_words": _int(row.get("ai_words"), f"{field}.ai_words", errors),
+            "pct_student": _num(row.get("pct_student"), f"{field}.pct_student", errors),
+        })
+    total = value.get("total")
+    if not isinstance(total, dict):
+        errors.append("word_counts.total: expected an object")
+        return {"rows": rows, "total": None}
+    total = {
+        "student_words": _int(total.get("student_words"), "word_counts.total.student_words", errors),
+        "ai_words": _int(total.get("ai_words"), "word_counts.total.ai_words", errors),
+        "pct_student": _num(total.get("pct_student"), "word_counts.total.pct_student", errors),
+    }
+    return {"rows": rows, "total": total}
+
+
+def validate(data) -> Tuple[Optional[dict], List[str]]:
+    """
+    Check a parsed summary against the schema.
+
+    Returns (normalised summary, errors); the summary is None when errors is
+    non-empty. Layer names are canonicalised and layers sorted by level.
+    """
+    errors = []
+    if not isinstance(data, dict):
+        return None, ["summary: expected a JSON object"]
+    missing = [k for k in ("highest_level", "layers", "recursion_count", "quotes", "word_counts",
+                           "agentic_moves", "notable_features") if k not in data]
+    if missing:
+        return None, [f"missing keys: {', '.join(missing)}"]
+
+    highest = _level(data["highest_level"], "highest_level", errors)
+
+    layers = []
+    if not isinstance(data["layers"], list):
+        errors.append("layers: expected a list")
+    else:
+        for i, entry in enumerate(data["layers"]):
+            field = f"layers[{i}]"
+            if not isinstance(entry, dict):
+                errors.append(f"{field}: expected an object")
+                continue
+            level = _level({"name": entry.get("layer"), "level": entry.get("level")}, field, errors)
+            if level:
+                layers.append({"layer": level["name"], "level": level["level"],
+                               "evidence": _strings(entry.get("evidence", []), f"{field}.evidence", errors)})
+        layers.sort(key=lambda entry: entry["level"])
+    if highest and layers and highest["level"] < layers[-1]["level"]:
+        errors.append(f"highest_level: {highest['name']} is below evidenced layer {layers[-1]['layer']}")
+
+    quotes = []
+    if not isinstance(data["quotes"], list):
+        errors.append("quotes: expected a list")
+    else:
+        for i, q in enumerate(data["quotes"]):
+            field = f"quotes[{i}]"
+            if not isinstance(q, dict) or not isinstance(q.get("text"), str):
+                errors.append(f"{field}: expected an object with text")
+                continue
+            speaker = str(q.get("speaker", "")).strip().lower()
+            if speaker not in SPEAKERS:
+                errors.append(f"{field}.speaker: expected student or ai, got {q.get('speaker')!r}")
+            quotes.append({"speaker": speaker, "text": q["text"].strip(), "page": q.get("page")})
+
+    summary = {
+        "highest_level": highest,
+        "layers": layers,
+        "recursion_count": _int(data["recursion_count"], "recursion_count", errors),
+        "quotes": quotes,
+        "word_counts": _word_counts(data["word_counts"], errors),
+        "agentic_moves": _strings(data["agentic_moves"], "agentic_moves", errors),
+        "notable_features": _strings(data["notable_features"], "notable_features", errors),
+    }
+    return (None, errors) if errors else (summary, [])
+
+
+def parse_summary(raw: Optional[str]) -> Tuple[Optional[dict], List[str]]:
+    """validate() for raw JSON text (None = no block found)."""
+    if raw is None:
+        return None, ["no ```json summary block at the end of the answer"]
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        return None, [f"invalid JSON: {e}"]
+    return validate(data)
+
+
+def sidecar_path(memo_file: Path) -> Path:
+    return memo_file.with_suffix(".json")
+
+
+def make_record(transcript_id: str, memo_markdown: str, summary: dict, **meta) -> dict:
+    """Corpus record: identification, provenance and the validated summary."""
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "transcript_id": transcript_id,
+        "memo_sha256": hashlib.sha256(memo_markdown.encode("utf-8")).hexdigest(),
+        **meta,
+        **summary,
+    }
+
+
+def load_corpus(path: Path) -> Dict[str, dict]:
+    """
+    Latest record per transcript_id from a corpus JSONL file (missing file = empty).
+    Lines that are not a current-schema record with a transcript_id are skipped.
+    """
+    records = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # a torn last line from an interrupted run
+                if (isinstance(rec, dict) and rec.get("schema_version") == SCHEMA_VERSION
+                        and isinstance(rec.get("transcript_id"), str) and rec["transcript_id"]):
+                    records[rec["transcript_id"]] = rec
+    except FileNotFoundError:
+        pass
+    return records
+
+
+_append_lock = threading.Lock()
+
+
+def append_corpus(path: Path, record: dict) -> None:
+    """Append one record as a single line (fsynced; safe from concurrent threads)."""
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _append_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
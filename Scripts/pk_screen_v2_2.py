@@ -9,16 +9,15 @@ Adds:
 - Slightly broader AI preamble/prefix detection
 """
 
-import argparse, csv, math, re, sys, unicodedata
+import argparse, csv, hashlib, itertools, json, math, os, re, sys, time, unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from datetime import datetime
 
-# Optional .docx support
-try:
-    import docx  # python-docx
-except Exception:
-    docx = None
-    
+# .docx text comes through the shared plaintext cache (python-docx imported only on a miss)
+from docx_cache import DOCX_ENGINES, docx_engine, read_docx_text, set_docx_engine
+
 # optional model support
 try:
     import joblib
@@ -83,6 +82,25 @@ AI_PERSONA_PREFIXES = [
     "hello! i'm an ai","hello! i'm a","i'm an ai", "i am an ai"
 ]
 
+# Label tables compiled once at import (see classify_line_initial).
+# Lowercased explicit-tag lookup; AI labels take precedence, as in the original loops.
+EXPLICIT_LABEL_SPEAKER = {x.lower(): "student" for x in STUDENT_LABELS}
+EXPLICIT_LABEL_SPEAKER.update({x.lower(): "ai" for x in AI_LABELS})
+# One alternation tried in table order (AI labels first, then student labels);
+# the named group that matched gives the speaker, m.end() gives the remainder.
+SPEAKER_LABEL_RE = re.compile(
+    r"(?i)^(?:(?P<ai>" + "|".join(map(re.escape, AI_LABELS)) + r")"
+    r"|(?P<student>" + "|".join(map(re.escape, STUDENT_LABELS)) + r"))\b[:\-]?"
+)
+AI_PERSONA_TUPLE = tuple(AI_PERSONA_PREFIXES)
+
+LEADING_BULLETS_RE = re.compile(r"^[\s>*-]+")
+ANSWER_HEADER_RE = re.compile(r"(?i)^\s*(my\s+answer|student\s+answer)\s*[:\-]?\s*$")
+INLINE_MY_ANSWER_RE = re.compile(r"(?i)\bmy\s*answer\s*:")
+EXPLICIT_TAG_RE = re.compile(r"^\s*\[?(?P<label>[A-Za-z ]{1,20})\]?\s*[:\-]\s*(?P<rest>.*)$")
+Q_PREFIX_RE = re.compile(r"(?i)^Q\s*[:\-]")
+A_PREFIX_RE = re.compile(r"(?i)^A\s*[:\-]")
+
 # Wide "instructions block" markers (case-insensitive; if these appear before any student content, ignore them)
 INSTR_START = [
     r"^\s*you\s+are\s+a\b",
@@ -106,6 +124,7 @@ AI_PREAMBLE_PREFIXES = [
     "as an ai","i can help","i can explain","i will","great question",
     "absolutely","happy to","i'd be happy","i'd be happy",
 ]
+AI_PREAMBLE_TUPLE = tuple(AI_PREAMBLE_PREFIXES)
 
 URL_RE   = re.compile(r"(?i)\b(?:https?://|www\.)\S+")
 EMAIL_RE = re.compile(r"(?i)\b[\w.+-]+@[\w.-]+\.[a-z]{2,}\b")
@@ -115,6 +134,16 @@ MATH_RE = re.compile("[" + re.escape(MATH_CHARS) + "]")
 
 CJK_RE = re.compile("[" "\u3400-\u4DBF" "\u4E00-\u9FFF" "\u3040-\u30FF" "\uAC00-\uD7AF" "]")
 
+# Compiled scanners for token_counts(): whole runs/tokens per match instead of per-character loops
+CJK_RUN_RE = re.compile(CJK_RE.pattern + "+")
+# Words (as tokenize_basic_english sees them once math chars are blanked) or a single math char.
+# findall() yields "" for a word and the character for a math token.
+WORD_OR_MATH_RE = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z0-9]+)?|(" + MATH_RE.pattern + ")")
+# Words that tokenize_mathish sees as two alnum runs ("don't" -> don, t)
+APOS_JOIN_RE = re.compile(r"[A-Za-z0-9]+'[A-Za-z0-9]+")
+BASIC_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z0-9]+)?(?:-[A-Za-z0-9]+)?")
+HAS_WORD_RE = re.compile(r"[\w]")
+
 PAGE_MARKERS = [
     re.compile(r"(?i)^\s*[-=]{2,}\s*Page\s*\d+\s*[-=]{2,}\s*$"),
     re.compile(r"(?i)^\s*Page\s*\d+\s*$"),
@@ -124,10 +153,10 @@ def load_text(path: Path) -> str:
     if path.suffix.lower() == ".txt":
         return path.read_text(encoding="utf-8", errors="ignore")
     if path.suffix.lower() == ".docx":
-        if docx is None:
-            raise RuntimeError("python-docx not installed. `pip install python-docx`. ")
-        d = docx.Document(str(path))
-        return "\n".join(p.text for p in d.paragraphs)
+        try:
+            return read_docx_text(path)
+        except ImportError:
+            raise RuntimeError("python-docx not installed. `pip install python-docx` or use --docx-engine xml.")
     raise ValueError(f"Unsupported file type: {path}")
 
 def normalize_text(s: str) -> str:
@@ -153,8 +182,193 @@ def split_pages(text: str):
         pages = [text.strip()]
     return pages
 
+# ==== Stage timing (--profile) ====
+PROFILE_STAGES = ["load", "normalize", "paginate", "boilerplate", "instructions",
+                  "classify", "smooth", "model", "tokens", "annotate"]
+
+class StageTimer:
+    """Exclusive wall time and call counts per named stage.
+
+    Nested stages are subtracted from the enclosing one, so the per-stage
+    seconds add up to the time spent inside any stage.
+    """
+    def __init__(self):
+        self.totals = {}
+        self._child = []
+
+    @contextmanager
+    def stage(self, name):
+        self._child.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            inner = self._child.pop()
+            if self._child:
+                self._child[-1] += dt
+            sec, n = self.totals.get(name, (0.0, 0))
+            self.totals[name] = (sec + dt - inner, n + 1)
+
+    def wrap_iter(self, it, name):
+        """Time each next() of an iterator (e.g. streamed lines) as stage `name`."""
+        it = iter(it)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+class NullTimer:
+    """Stand-in for StageTimer when --profile is off."""
+    totals = {}
+
+    def stage(self, name):
+        return nullcontext()
+
+    def wrap_iter(self, it, name):
+        return it
+
+NULL_TIMER = NullTimer()
+def write_timings(path: Path, timings):
+    """timings.csv: one row per screened file, seconds and call count per stage."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["filename", "total_s"]
+                   + [c for st in PROFILE_STAGES for c in (f"{st}_s", f"{st}_calls")])
+        for fname, stages, wall in timings:
+            row = [fname, f"{wall:.6f}"]
+            for st in PROFILE_STAGES:
+                sec, n = stages.get(st, (0.0, 0))
+                row += [f"{sec:.6f}", n]
+            w.writerow(row)
+
+def print_timing_rollup(timings):
+    """Corpus-wide per-stage totals for --profile."""
+    if not timings:
+        print("\nProfile: no files screened (all cached).")
+        return
+    wall = sum(t for _f, _s, t in timings)
+    nfiles = len(timings)
+    print(f"\nProfile ({nfiles} file(s), {wall:.3f} s screening):")
+    print(f"  {'stage':<13}{'seconds':>10}{'% total':>9}{'calls':>10}{'ms/file':>10}")
+    staged = 0.0
+    for st in PROFILE_STAGES:
+        sec = sum(s.get(st, (0.0, 0))[0] for _f, s, _t in timings)
+        n = sum(s.get(st, (0.0, 0))[1] for _f, s, _t in timings)
+        staged += sec
+        pct = 100.0 * sec / wall if wall else 0.0
+        print(f"  {st:<13}{sec:>10.3f}{pct:>8.1f}%{n:>10}{1000*sec/nfiles:>10.2f}")
+    other = max(wall - staged, 0.0)
+    pct = 100.0 * other / wall if wall else 0.0
+    print(f"  {'(other)':<13}{other:>10.3f}{pct:>8.1f}%{'':>10}{1000*other/nfiles:>10.2f}")
+# ==== /stage timing ====
+
+# ==== Streaming reader: normalized lines -> pages, without holding the whole text ====
+NEWLINE_RE = re.compile(r"\r\n|\r|\n")
+STREAM_CHUNK_CHARS = 1 << 16
+
+def _text_chunk_source(path: Path):
+    """Return (make_chunks, has_form_feed); make_chunks() yields the raw text in pieces.
+
+    For .txt the file is decoded incrementally; .docx text comes from load_text()
+    (cached paragraph text joined by "\\n"), which is a single string anyway.
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".txt":
+        def make_chunks():
+            with open(path, encoding="utf-8", errors="ignore", newline="") as f:
+                for chunk in iter(lambda: f.read(STREAM_CHUNK_CHARS), ""):
+                    yield chunk
+        has_ff = False
+        with open(path, "rb") as fb:
+            for block in iter(lambda: fb.read(1 << 20), b""):
+                if b"\f" in block:
+                    has_ff = True
+                    break
+        return make_chunks, has_ff
+    if suffix == ".docx":
+        text = load_text(path)
+        def make_chunks():
+            yield text
+        return make_chunks, "\f" in text
+    raise ValueError(f"Unsupported file type: {path}")
+
+def iter_normalized_lines(chunks):
+    """Yield the lines of normalize_text("".join(chunks)).split("\\n") one at a time.
+
+    NFC is applied per line; line breaks never take part in composition, so
+    this matches normalizing the whole text first.
+    """
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        # a trailing "\r" may be the first half of "\r\n" in the next chunk
+        held = buf.endswith("\r")
+        parts = NEWLINE_RE.split(buf[:-1] if held else buf)
+        for ln in parts[:-1]:
+            yield unicodedata.normalize("NFC", ln)
+        buf = parts[-1] + ("\r" if held else "")
+    for ln in NEWLINE_RE.split(buf):
+        yield unicodedata.normalize("NFC", ln)
+
+def iter_pages(lines, form_feed: bool):
+    """Yield each page as a list of lines, mirroring split_pages() on the joined text.
+
+    Pages are not .strip()ped as in split_pages(); every consumer strips lines itself.
+    """
+    if form_feed:
+        cur = []
+        for ln in lines:
+            pieces = ln.split("\f")
+            for piece in pieces[:-1]:
+                cur.append(piece)
+                yield cur
+                cur = []
+            cur.append(pieces[-1])
+        yield cur
+        return
+
+    cur, leading_markers, emitted = [], [], False
+    for ln in lines:
+        if any(pat.match(ln) for pat in PAGE_MARKERS):
+            if cur:
+                yield cur
+                cur, emitted = [], True
+            elif not emitted:
+                leading_markers.append(ln)
+            continue
+        cur.append(ln)
+    if cur:
+        yield cur
+    elif not emitted:
+        # nothing but page markers: split_pages() falls back to the whole text
+        yield leading_markers
+
+def iter_transcript_pages(path: Path, skip_boilerplate=False, timer=NULL_TIMER):
+    """Return (boilerplate_lines_skipped, page iterator) for a transcript, streamed from disk."""
+    with timer.stage("load"):
+        make_chunks, has_ff = _text_chunk_source(path)
+    lines = timer.wrap_iter(iter_normalized_lines(timer.wrap_iter(make_chunks(), "load")), "normalize")
+    if not skip_boilerplate:
+        return 0, timer.wrap_iter(iter_pages(lines, has_ff), "paginate")
+
+    head = list(itertools.islice(lines, BOILERPLATE_SCAN_LINES))
+    with timer.stage("boilerplate"):
+        content_start = detect_boilerplate_end(head, max_lines=BOILERPLATE_SCAN_LINES)
+    form_feed = has_ff
+    if has_ff and content_start > 0 and not any("\f" in ln for ln in head[content_start:]):
+        # the only form feeds might sit inside the skipped boilerplate
+        rest = iter_normalized_lines(make_chunks())
+        form_feed = any("\f" in ln for ln in itertools.islice(rest, len(head), None))
+    pages = iter_pages(itertools.chain(head[content_start:], lines), form_feed)
+    return content_start, timer.wrap_iter(pages, "paginate")
+# ==== /streaming reader ====
+
 def _explicit_tag(line: str):
-    m = re.match(r"^\s*\[?(?P<label>[A-Za-z ]{1,20})\]?\s*[:\-]\s*(?P<rest>.*)$", line)
+    m = EXPLICIT_TAG_RE.match(line)
     if not m:
         return None
     return m.group("label").strip(), m.group("rest").strip()
@@ -164,7 +378,7 @@ def _is_instruction_line(s: str) -> bool:
 
 def _split_my_answer_inline(s: str):
     """If 'my answer:' appears inline, split -> (left, right) else (None, None)."""
-    m = re.search(r"(?i)\bmy\s*answer\s*:", s)
+    m = INLINE_MY_ANSWER_RE.search(s)
     if not m:
         return None, None
     cut = m.end()
@@ -177,10 +391,10 @@ def classify_line_initial(raw: str, prev_speaker: str|None, in_student_block: bo
     if not line:
         return ("unknown","",False,False)
 
-    line_wo = re.sub(r"^[\s>*-]+", "", line)
+    line_wo = LEADING_BULLETS_RE.sub("", line)
 
     # My answer: block header (solo line)
-    if re.match(r"(?i)^\s*(my\s+answer|student\s+answer)\s*[:\-]?\s*$", line_wo):
+    if ANSWER_HEADER_RE.match(line_wo):
         return ("student","",False,True)
 
     # Inline "My answer:" split
@@ -193,29 +407,23 @@ def classify_line_initial(raw: str, prev_speaker: str|None, in_student_block: bo
     tag = _explicit_tag(line_wo)
     if tag:
         label, rest = tag
-        lab_low = label.lower()
-        if lab_low in {"t","a"}:   return ("ai", rest, False, False)
-        if lab_low in {"s","u","me"}: return ("student", rest, False, False)
-        if lab_low in {x.lower() for x in AI_LABELS}:      return ("ai", rest, False, False)
-        if lab_low in {x.lower() for x in STUDENT_LABELS}: return ("student", rest, False, False)
-
-    for pref in AI_PERSONA_PREFIXES:
-        if line_wo.lower().startswith(pref):
-            return ("ai", line_wo, True, False)
-
-    for lab in AI_LABELS:
-        if re.match(fr"(?i)^{re.escape(lab)}\b[:\-]?", line_wo):
-            rest = re.sub(fr"(?i)^{re.escape(lab)}\b[:\-]?", "", line_wo).strip()
-            return ("ai", rest, False, False)
-    for lab in STUDENT_LABELS:
-        if re.match(fr"(?i)^{re.escape(lab)}\b[:\-]?", line_wo):
-            rest = re.sub(fr"(?i)^{re.escape(lab)}\b[:\-]?", "", line_wo).strip()
-            return ("student", rest, False, False)
-
-    if re.match(r"(?i)^Q\s*[:\-]", line_wo):
-        return ("student", re.sub(r"(?i)^Q\s*[:\-]", "", line_wo).strip(), True, False)
-    if re.match(r"(?i)^A\s*[:\-]", line_wo):
-        return ("ai", re.sub(r"(?i)^A\s*[:\-]", "", line_wo).strip(), True, False)
+        spk = EXPLICIT_LABEL_SPEAKER.get(label.lower())
+        if spk:
+            return (spk, rest, False, False)
+
+    if line_wo.lower().startswith(AI_PERSONA_TUPLE):
+        return ("ai", line_wo, True, False)
+
+    m = SPEAKER_LABEL_RE.match(line_wo)
+    if m:
+        return ("ai" if m.group("ai") is not None else "student", line_wo[m.end():].strip(), False, False)
+
+    m = Q_PREFIX_RE.match(line_wo)
+    if m:
+        return ("student", line_wo[m.end():].strip(), True, False)
+    m = A_PREFIX_RE.match(line_wo)
+    if m:
+        return ("ai", line_wo[m.end():].strip(), True, False)
 
     if in_student_block and line_wo:
         return ("student", line_wo, True, False)
@@ -295,6 +503,39 @@ def tokenize_basic_english(s: str) -> int:
     word_tokens = re.findall(r"[A-Za-z0-9]+(?:'[A-Za-z0-9]+)?(?:-[A-Za-z0-9]+)?", s)
     return urls + emails + len(word_tokens)
 
+def token_counts(text: str):
+    """Return (cjk, math, basic) token counts for one line.
+
+    Same rules as count_cjk_runs -> tokenize_mathish -> tokenize_basic_english,
+    but words and math symbols come out of a single compiled-regex scan instead of
+    Python loops over characters. Only lines containing a URL/email candidate
+    ("www." or "@") take the slower blank-then-rescan path.
+    """
+    cjk = 0
+    if CJK_RE.search(text):
+        for m in CJK_RUN_RE.finditer(text):
+            cjk += (m.end() - m.start() + 1) // 2   # ceil(run/2)
+        text = CJK_RUN_RE.sub("", text)
+
+    toks = WORD_OR_MATH_RE.findall(text)
+    words = toks.count("")
+    math_chars = len(toks) - words
+    math_n = 0
+    if math_chars:
+        # tokenize_mathish counts alnum runs, so "x'y" is two tokens there
+        joins = len(APOS_JOIN_RE.findall(text)) if "'" in text else 0
+        math_n = words + joins + math_chars
+
+    # "://" cannot survive math blanking ('/' is a math char), so URLs need "www."
+    if "@" not in text and not ("." in text and "www." in text.lower()):
+        return cjk, math_n, words
+
+    if math_chars:
+        text = MATH_RE.sub(" ", text)
+    text, urls = URL_RE.subn(" ", text)
+    text, emails = EMAIL_RE.subn(" ", text)
+    return cjk, math_n, urls + emails + len(BASIC_WORD_RE.findall(text))
+
 def line_token_count(text: str, simple_mode: bool = False) -> int:
     if not text: return 0
     
@@ -303,15 +544,13 @@ def line_token_count(text: str, simple_mode: bool = False) -> int:
         return len(text.split())
     
     # Comprehensive mode: CJK/math/URL tokenization per Appendix B
-    if not re.search(r"[\w]", text) and not CJK_RE.search(text):
+    if not HAS_WORD_RE.search(text) and not CJK_RE.search(text):
         return 0
-    cjk_count, rest = count_cjk_runs(text)
-    math_count = tokenize_mathish(rest)
-    rest_wo_math = re.sub(MATH_RE, " ", rest)
-    basic = tokenize_basic_english(rest_wo_math)
-    return cjk_count + math_count + basic
+    return sum(token_counts(text))
+
+BOILERPLATE_SCAN_LINES = 100
 
-def detect_boilerplate_end(all_lines, max_lines=100):
+def detect_boilerplate_end(all_lines, max_lines=BOILERPLATE_SCAN_LINES):
     """
     Scan the first max_lines to find where boilerplate ends and Taylor content begins.
     Returns line_number (0-indexed) where actual content starts, or 0 if no boilerplate detected.
@@ -376,51 +615,58 @@ def detect_instruction_block(lines):
         break
     return (i if seen_instr else 0, seen_instr)
 
-def screen_file(path, annotate_dir, units="words", approx=6.0,
-                model=None, cls_idx=None, thresh=0.65, uncertain_weight=0.5, 
-                simple_words=False, skip_boilerplate=False):
-    raw = load_text(path)
-    text = normalize_text(raw)
-    pages = split_pages(text)
-    
-    # Skip boilerplate if requested
-    boilerplate_lines_skipped = 0
-    if skip_boilerplate and pages:
-        # Combine all pages to find boilerplate boundary
-        all_lines = text.split("\n")
-        content_start = detect_boilerplate_end(all_lines)
-        if content_start > 0:
-            boilerplate_lines_skipped = content_start
-            # Recreate text without boilerplate
-            text = "\n".join(all_lines[content_start:])
-            pages = split_pages(text)
+def _apply_proba(seg, proba, cls_idx, thresh):
+    p_ai = proba[cls_idx["AI"]]
+    p_st = proba[cls_idx["STUDENT"]]
+    if max(p_ai, p_st) >= thresh:
+        seg["speaker"] = "student" if p_st >= p_ai else "ai"
+        seg["uncertain"] = False
 
-    ai_total = st_total = unk_total = 0
-    page_rows = []
-    ann_lines_all = []
-    
-    if skip_boilerplate and boilerplate_lines_skipped > 0:
-        ann_lines_all.append(f"[BOILERPLATE SKIPPED: {boilerplate_lines_skipped} lines]")
-        ann_lines_all.append("")
+def relabel_segments(segs, model, cls_idx, thresh):
+    """Score segs with one model.predict_proba call and relabel confident ones in place.
 
-    for p_idx, page in enumerate(pages, 1):
-        lines = page.split("\n")
-
-        # Detect & ignore a top instruction block on this page
+    If the batched call fails, segments are scored one at a time so a single bad
+    input does not discard the rest. Returns (n_failed, first_error_message).
+    """
+    if not segs:
+        return 0, ""
+    try:
+        probas = model.predict_proba([seg["text"] for seg in segs])
+        if len(probas) != len(segs):
+            raise ValueError(f"predict_proba returned {len(probas)} rows for {len(segs)} segments")
+    except Exception:
+        probas = None
+    if probas is not None:
+        for seg, proba in zip(segs, probas):
+            _apply_proba(seg, proba, cls_idx, thresh)
+        return 0, ""
+
+    failed = 0; first_err = ""
+    for seg in segs:
+        try:
+            _apply_proba(seg, model.predict_proba([seg["text"]])[0], cls_idx, thresh)
+        except Exception as e:
+            failed += 1
+            if not first_err:
+                first_err = f"{type(e).__name__}: {e}"
+    return failed, first_err
+
+# Uncertain segments are sent to the model in groups of at least this many,
+# so long transcripts do not keep every page in memory waiting for one call.
+RELABEL_BATCH_SEGMENTS = 512
+
+def classify_page(lines, timer=NULL_TIMER):
+    """Classify one page's lines -> (instr_lines, merged segments)."""
+    # Detect & ignore a top instruction block on this page
+    with timer.stage("instructions"):
         start_idx, had_instr = detect_instruction_block(lines)
-        instr_lines = lines[:start_idx] if had_instr else []
+    instr_lines = lines[:start_idx] if had_instr else []
 
+    with timer.stage("classify"):
         entries = []
         prev = None
         student_block = False
 
-        # annotate instruction block (ignored from counts)
-        if annotate_dir is not None and instr_lines:
-            for ln in instr_lines:
-                if ln.strip():
-                    ann_lines_all.append("[AI][IGNORED] " + ln.strip())
-            ann_lines_all.append("")
-
         # classify remaining lines
         i = start_idx
         while i < len(lines):
@@ -437,11 +683,8 @@ def screen_file(path, annotate_dir, units="words", approx=6.0,
                 if spk in {"ai","student"}:
                     prev = spk
                     # strip AI preambles at start of line
-                    if spk == "ai":
-                        for pref in AI_PREAMBLE_PREFIXES:
-                            if content.lower().startswith(pref):
-                                content = ""
-                                break
+                    if spk == "ai" and content.lower().startswith(AI_PREAMBLE_TUPLE):
+                        content = ""
                 entries.append({"speaker": spk, "text": content, "uncertain": unc})
             else:
                 # res is actually two tuples from inline split
@@ -457,45 +700,105 @@ def screen_file(path, annotate_dir, units="words", approx=6.0,
                     prev = "student"
             i += 1
 
+    with timer.stage("smooth"):
         entries = smooth_assign(entries)
         merged = merge_runs(entries)
-        
-        # Model relabel: only for unknown or uncertain segments; never override hard labels
-        if model is not None:
-            for seg in merged:
-                if not seg["text"].strip():
-                    continue
-                if seg["speaker"] == "unknown" or seg["uncertain"]:
-                    try:
-                        proba = model.predict_proba([seg["text"]])[0]
-                        p_ai = proba[cls_idx["AI"]]
-                        p_st = proba[cls_idx["STUDENT"]]
-                        if max(p_ai, p_st) >= thresh:
-                            seg["speaker"] = "student" if p_st >= p_ai else "ai"
-                            seg["uncertain"] = False
-                    except Exception:
-                        pass
-
-        # annotated (post-smoothing)
-        if annotate_dir is not None:
-            for seg in merged:
-                tag = "AI" if seg["speaker"]=="ai" else ("STUDENT" if seg["speaker"]=="student" else "UNK")
-                q = "?" if seg["uncertain"] else ""
-                ann_lines_all.append(f"[{tag}{q}] {seg['text']}")
-            ann_lines_all.append("")
-
-        ai_p = st_p = unk_p = 0
-        for seg in merged:
-            n = line_token_count(seg["text"], simple_mode=simple_words)
-            if seg["speaker"] == "ai":
-                ai_p += n
-            elif seg["speaker"] == "student":
-                st_p += n
-            else:
-                unk_p += n
+    return instr_lines, merged
 
-        page_rows.append((p_idx, st_p, ai_p, unk_p))
-        ai_total += ai_p; st_total += st_p; unk_total += unk_p
+def screen_file(path, annotate_dir, units="words", approx=6.0,
+                model=None, cls_idx=None, thresh=0.65, uncertain_weight=0.5, 
+                simple_words=False, skip_boilerplate=False, profile=False):
+    # Lines are streamed from disk page by page; only a group of classified
+    # pages awaiting a model call is held at once.
+    t_start = time.perf_counter()
+    timer = StageTimer() if profile else NULL_TIMER
+    boilerplate_lines_skipped, pages = iter_transcript_pages(path, skip_boilerplate, timer)
+
+    ai_total = st_total = unk_total = 0
+    page_rows = []
+    model_failures = 0; model_error = ""
+
+    ann_out = ann_tmp = None
+    if annotate_dir is not None:
+        ann_path = annotate_dir / f"{path.stem}__annotated.txt"
+        ann_tmp = ann_path.with_name(ann_path.name + ".tmp")
+        ann_out = open(ann_tmp, "w", encoding="utf-8")
+    ann_first = True
+
+    def annotate(line):
+        nonlocal ann_first
+        if not ann_first:
+            ann_out.write("\n")
+        ann_out.write(line)
+        ann_first = False
+
+    def flush(pending):
+        nonlocal model_failures, model_error, ai_total, st_total, unk_total
+        # Model relabel: only for unknown or uncertain segments; never override hard labels.
+        # All pending candidates are scored in one predict_proba call.
+        if model is not None:
+            candidates = [seg for _p, _i, merged in pending for seg in merged
+                          if seg["text"].strip() and (seg["speaker"] == "unknown" or seg["uncertain"])]
+            with timer.stage("model"):
+                n_failed, err = relabel_segments(candidates, model, cls_idx, thresh)
+            model_failures += n_failed
+            model_error = model_error or err
+
+        for p_idx, instr_lines, merged in pending:
+            if ann_out is not None:
+                with timer.stage("annotate"):
+                    # annotate instruction block (ignored from counts)
+                    if instr_lines:
+                        for ln in instr_lines:
+                            if ln.strip():
+                                annotate("[AI][IGNORED] " + ln.strip())
+                        annotate("")
+                    # annotated (post-smoothing)
+                    for seg in merged:
+                        tag = "AI" if seg["speaker"]=="ai" else ("STUDENT" if seg["speaker"]=="student" else "UNK")
+                        q = "?" if seg["uncertain"] else ""
+                        annotate(f"[{tag}{q}] {seg['text']}")
+                    annotate("")
+
+            ai_p = st_p = unk_p = 0
+            with timer.stage("tokens"):
+                for seg in merged:
+                    n = line_token_count(seg["text"], simple_mode=simple_words)
+                    if seg["speaker"] == "ai":
+                        ai_p += n
+                    elif seg["speaker"] == "student":
+                        st_p += n
+                    else:
+                        unk_p += n
+
+            page_rows.append((p_idx, st_p, ai_p, unk_p))
+            ai_total += ai_p; st_total += st_p; unk_total += unk_p
+
+    try:
+        if ann_out is not None and skip_boilerplate and boilerplate_lines_skipped > 0:
+            annotate(f"[BOILERPLATE SKIPPED: {boilerplate_lines_skipped} lines]")
+            annotate("")
+
+        pending = []; n_candidates = 0
+        for p_idx, lines in enumerate(pages, 1):
+            instr_lines, merged = classify_page(lines, timer)
+            pending.append((p_idx, instr_lines, merged))
+            if model is not None:
+                n_candidates += sum(1 for seg in merged if seg["speaker"] == "unknown" or seg["uncertain"])
+            if n_candidates >= RELABEL_BATCH_SEGMENTS or model is None:
+                flush(pending)
+                pending = []; n_candidates = 0
+        flush(pending)
+    except BaseException:
+        if ann_out is not None:
+            ann_out.close()
+            ann_tmp.unlink(missing_ok=True)
+        raise
+
+    if ann_out is not None:
+        with timer.stage("annotate"):
+            ann_out.close()
+            os.replace(ann_tmp, ann_path)
 
     total = ai_total + st_total
     pct_st = round((st_total / total * 100.0), 1) if total > 0 else 0.0
@@ -507,10 +810,6 @@ def screen_file(path, annotate_dir, units="words", approx=6.0,
     elif pct_st in (0.0, 100.0):
         status, note = "needs_review", "extreme_pct"
 
-    if annotate_dir is not None:
-        ann_path = annotate_dir / f"{path.stem}__annotated.txt"
-        ann_path.write_text("\n".join(ann_lines_all), encoding="utf-8")
-
     return {
         "filename": path.name,
         "pages": page_rows,
@@ -521,7 +820,94 @@ def screen_file(path, annotate_dir, units="words", approx=6.0,
         "pct_student": pct_st,
         "status": status,
         "note": note,
+        "model_failures": model_failures,
+        "model_error": model_error,
+        **({"timings": {k: list(v) for k, v in timer.totals.items()},
+            "wall_seconds": time.perf_counter() - t_start} if profile else {}),
+    }
+
+# ==== Parallel screening (--workers) ====
+# Each worker process receives the screening options (and the model) once via the
+# pool initializer instead of re-pickling them with every file.
+_WORKER_KWARGS = {}
+
+def _init_worker(kwargs):
+    global _WORKER_KWARGS
+    _WORKER_KWARGS = kwargs
+
+def _screen_in_worker(path):
+    return screen_file(path, **_WORKER_KWARGS)
+
+def iter_screen_results(files, kwargs, workers=1):
+    """Yield (path, rec, error) for each file in input order.
+
+    With workers > 1 the files are screened in a process pool, but results are
+    still yielded in the original order so summary.csv/pages.csv are identical
+    to a serial run.
+    """
+    if workers <= 1 or len(files) <= 1:
+        for path in files:
+            try:
+                yield path, screen_file(path, **kwargs), None
+            except Exception as e:
+                yield path, None, e
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files)),
+                             initializer=_init_worker, initargs=(kwargs,)) as pool:
+        futures = [pool.submit(_screen_in_worker, path) for path in files]
+        for path, fut in zip(files, futures):
+            try:
+                yield path, fut.result(), None
+            except Exception as e:
+                yield path, None, e
+# ==== /parallel ====
+
+# ==== Incremental screening (manifest.json in --outdir) ====
+# Bump when the counting/attribution rules change so old manifests are ignored.
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def options_fingerprint(simple_words=False, skip_boilerplate=False, model_path=None, model_thresh=0.65,
+                        docx_engine_name="python-docx") -> str:
+    """Hash of the options that change screen_file() output."""
+    model_id = None
+    if model_path:
+        mp = Path(model_path).expanduser().resolve()
+        st = mp.stat()
+        model_id = [str(mp), st.st_size, st.st_mtime_ns]
+    opts = {
+        "version": MANIFEST_VERSION,
+        "simple_words": bool(simple_words),
+        "skip_boilerplate": bool(skip_boilerplate),
+        "model": model_id,
+        "model_thresh": float(model_thresh) if model_path else None,
+        "docx_engine": docx_engine_name,
     }
+    return hashlib.sha256(json.dumps(opts, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_manifest(path: Path) -> dict:
+    """Return {filename: entry} from a previous run, or {} if missing/unreadable."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+def save_manifest(path: Path, entries: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "files": entries}, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+# ==== /incremental ====
 
 def main():
     ap = argparse.ArgumentParser()
@@ -565,8 +951,37 @@ def main():
         action="store_true",
         help="Skip initial AI personality test/teacher profile boilerplate before Taylor content begins."
     )
+
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Screen files in N parallel processes (default 1 = serial). Output order is unchanged."
+    )
+
+    ap.add_argument(
+        "--docx-engine",
+        choices=sorted(DOCX_ENGINES),
+        default=None,
+        help="How to extract .docx text: python-docx (default) or xml (zip + iterparse, no python-docx needed; validate_docx_text.py checks it gives the same text)."
+    )
+
+    ap.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each pipeline stage per file; writes timings.csv next to summary.csv and prints a corpus roll-up."
+    )
+
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"Reuse results from {MANIFEST_NAME} in --outdir for files whose content and screening options are "
+             f"unchanged, and record this run there (only --incremental runs hash inputs and write {MANIFEST_NAME}). "
+             "Rewrites an existing summary.csv without --force."
+    )
     
     args = ap.parse_args()
+    set_docx_engine(args.docx_engine)
     uncertain_weight = float(getattr(args, "uncertain_weight", 0.5))
     approx_c = float(getattr(args, "approx_words_from_chars", 6.0))
     
@@ -595,16 +1010,42 @@ def main():
     summary_path = out_dir / "summary.csv"
     pages_path = out_dir / "pages.csv"
     log_path = out_dir / "log.txt"
+    timings_path = out_dir / "timings.csv"
+
+    manifest_path = out_dir / MANIFEST_NAME
 
-    if summary_path.exists() and not args.force:
+    if summary_path.exists() and not (args.force or args.incremental):
         print(f"[abort] {summary_path} exists. Use --force to overwrite.", file=sys.stderr)
         sys.exit(2)
+    if summary_path.exists() and args.incremental and not args.force:
+        print(f"[note] --incremental: rewriting {summary_path} (unchanged files reuse their {MANIFEST_NAME} results)",
+              file=sys.stderr)
 
     files = sorted([p for p in in_dir.iterdir() if p.suffix.lower() in {".txt",".docx"}])
     if not files:
         print(f"[error] no transcripts found in {in_dir}", file=sys.stderr)
         sys.exit(1)
 
+    fingerprint = options_fingerprint(
+        simple_words=getattr(args, 'simple_words', False),
+        skip_boilerplate=getattr(args, 'skip_boilerplate', False),
+        model_path=args.model,
+        model_thresh=args.model_thresh,
+        docx_engine_name=docx_engine(),
+    )
+    prior = load_manifest(manifest_path) if args.incremental else {}
+    hashes = {p.name: file_sha256(p) for p in files} if args.incremental else {}
+    manifest = {}
+    for p in files:
+        ent = prior.get(p.name)
+        if not ent or ent.get("sha256") != hashes[p.name] or ent.get("options") != fingerprint:
+            continue
+        if args.annotate and not (ent.get("annotated")
+                                  and (out_dir / "annotated" / f"{p.stem}__annotated.txt").exists()):
+            continue
+        manifest[p.name] = ent
+    pending = [p for p in files if p.name not in manifest]
+
     with open(summary_path, "w", newline="", encoding="utf-8") as fsum, \
          open(pages_path, "w", newline="", encoding="utf-8") as fpages, \
          open(log_path, "w", encoding="utf-8") as flog:
@@ -620,38 +1061,71 @@ def main():
         flog.write(f"pk_screen_v2_1.py run at {datetime.now().isoformat()}\n")
         flog.write(f"Input dir: {in_dir}\n\n")
 
+        screen_kwargs = dict(
+            annotate_dir=(out_dir / "annotated") if args.annotate else None,
+            units=args.units,
+            approx=args.approx_words_from_chars,
+            model=model, cls_idx=cls_idx, thresh=args.model_thresh, uncertain_weight=uncertain_weight,
+            simple_words=getattr(args, 'simple_words', False),
+            skip_boilerplate=getattr(args, 'skip_boilerplate', False),
+            profile=args.profile,
+        )
+        fresh = iter_screen_results(pending, screen_kwargs, workers=args.workers)
+        if args.incremental:
+            flog.write(f"Incremental: {len(files) - len(pending)} cached, {len(pending)} to screen\n\n")
+
+        model_failures_total = 0
+        timings = []
         for i, path in enumerate(files, 1):
-            try:
-                rec = screen_file(
-                    path,
-                    (out_dir / "annotated") if args.annotate else None,
-                    args.units,
-                    args.approx_words_from_chars,   # <— now exists
-                    model=model, cls_idx=cls_idx, thresh=args.model_thresh, uncertain_weight=uncertain_weight,
-                    simple_words=getattr(args, 'simple_words', False),
-                    skip_boilerplate=getattr(args, 'skip_boilerplate', False),
-                )
-
-                sum_writer.writerow({
-                    "filename": rec["filename"],
-                    "student_words": rec["student_words"],
-                    "ai_words": rec["ai_words"],
-                    "total": rec["total"],
-                    "pct_student": rec["pct_student"],
-                    "unknown_words": rec["unknown_words"],
-                    "status": rec["status"],
-                    "note": rec["note"],
-                })
-                for (pg, st, ai, un) in rec["pages"]:
-                    pages_writer.writerow([rec["filename"], pg, st, ai, un])
-                print(f"[{i}/{len(files)}] {path.name}  →  %Student {rec['pct_student']}  ({rec['status']})")
-            except Exception as e:
-                print(f"[{i}/{len(files)}] {path.name}  →  ERROR: {type(e).__name__}: {e}")
-                flog.write(f"ERROR {path.name}: {type(e).__name__}: {e}\n")
-
+            if path.name in manifest:
+                rec, err, how = manifest[path.name]["record"], None, "  [cached]"
+            else:
+                _p, rec, err, how = *next(fresh), ""
+            if err is not None:
+                print(f"[{i}/{len(files)}] {path.name}  →  ERROR: {type(err).__name__}: {err}")
+                flog.write(f"ERROR {path.name}: {type(err).__name__}: {err}\n")
+                continue
+
+            sum_writer.writerow({
+                "filename": rec["filename"],
+                "student_words": rec["student_words"],
+                "ai_words": rec["ai_words"],
+                "total": rec["total"],
+                "pct_student": rec["pct_student"],
+                "unknown_words": rec["unknown_words"],
+                "status": rec["status"],
+                "note": rec["note"],
+            })
+            for (pg, st, ai, un) in rec["pages"]:
+                pages_writer.writerow([rec["filename"], pg, st, ai, un])
+            print(f"[{i}/{len(files)}] {path.name}  →  %Student {rec['pct_student']}  ({rec['status']}){how}")
+            if rec.get("model_failures"):
+                msg = f"{rec['model_failures']} segment(s) could not be scored ({rec['model_error']})"
+                print(f"      model: {msg}")
+                flog.write(f"MODEL {path.name}: {msg}\n")
+                model_failures_total += rec["model_failures"]
+            if "timings" in rec:
+                timings.append((rec["filename"], rec.pop("timings"), rec.pop("wall_seconds")))
+            if args.incremental and not how:
+                manifest[path.name] = {
+                    "sha256": hashes[path.name],
+                    "options": fingerprint,
+                    "annotated": bool(args.annotate),
+                    "record": rec,
+                }
+
+    if args.incremental:
+        save_manifest(manifest_path, {p.name: manifest[p.name] for p in files if p.name in manifest})
+    if args.profile:
+        write_timings(timings_path, timings)
+        print_timing_rollup(timings)
     print("\nDone.")
+    if model_failures_total:
+        print(f"  Model:   {model_failures_total} uncertain segment(s) left unscored (see {log_path.name})")
     print(f"  Summary: {summary_path}")
     print(f"  Pages:   {pages_path}")
+    if args.profile:
+        print(f"  Timings: {timings_path}")
     if args.annotate:
         print(f"  Annot:   {out_dir/'annotated'}")
 
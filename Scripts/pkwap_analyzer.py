@@ -8,6 +8,7 @@ PK-WAP template from Appendix F.
 Usage:
   python3 pkwap_analyzer.py --transcript P28-G16-S5.txt --output memos/
   python3 pkwap_analyzer.py --batch transcripts/ --output memos/ --limit 10
+  python3 pkwap_analyzer.py --batch transcripts/ --output memos/ --concurrency 8 --rpm 60
   python3 pkwap_analyzer.py --transcript P28-G16-S5.txt --model gpt-4o --temperature 0.3
   python3 pkwap_analyzer.py --transcript P28.txt --openrouter --model openai/gpt-4o-mini
 
@@ -18,11 +19,18 @@ Requirements:
 """
 
 import argparse
+import asyncio
+import functools
+import hashlib
+import importlib.util
+import math
+import re
 import sys
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Optional, List
 import json
 
 # Load .env file if present
@@ -36,18 +44,49 @@ if env_file.exists():
                 key, value = line.split("=", 1)
                 os.environ.setdefault(key.strip(), value.strip())
 
-try:
-    from openai import OpenAI
-except ImportError:
+# llm_client imports openai on first use; fail here, before any work, if it is missing
+if importlib.util.find_spec("openai") is None:
     print("Error: OpenAI package not installed.")
     print("Install with: pip install openai")
     sys.exit(1)
 
+from docx_cache import DOCX_ENGINES, read_docx_text, set_docx_engine
+from llm_cache import CACHE_MODES, cached_completion, set_cache_mode
+from llm_client import get_client, record_usage, resolve_base_url, set_timeouts, take_last_request, track_request
+from memo_schema import (CORPUS_FILE, SCHEMA_PROMPT, SCHEMA_SPEC, append_corpus, load_corpus, make_record,
+                         parse_summary, sidecar_path, split_memo)
+from pk_screen_v2_2 import normalize_text, split_pages
+import llm_cache
+import llm_client
+
 # Configuration defaults
 DEFAULT_MODEL = "gpt-4o"
 DEFAULT_TEMPERATURE = 0.2
 DEFAULT_MAX_TOKENS = 16000
-BATCH_SLEEP = 2.0  # seconds between API calls
+BATCH_SLEEP = 2.0  # average seconds between API call starts
+DEFAULT_CONCURRENCY = 1  # transcripts in flight at once
+DEFAULT_RPM = 60.0 / BATCH_SLEEP  # token-bucket request rate (requests per minute)
+
+# Context windows (prompt + completion tokens) by model name; --context-tokens overrides
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-4.1-mini": 1047576,
+    "gpt-4": 8192,
+    "claude-3.5-sonnet": 200000,
+}
+DEFAULT_CONTEXT_TOKENS = 128000
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+BUDGET_MARGIN = 0.05  # headroom for estimator error and message framing
+MIN_PARTIAL_TOKENS = 1000  # smallest useful output cap for one chunk's notes
+
+# Optional exact tokenizer; otherwise a character-based estimate is used
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
 
 # File paths
 TEMPLATE_FILE = "P00-G00-S0 PK-WAP TEMPLATE.md"
@@ -59,11 +98,9 @@ def read_file(path: Path) -> str:
     """Read text or docx file, extracting text content."""
     if path.suffix.lower() == '.docx':
         try:
-            from docx import Document
-            doc = Document(path)
-            return '\n'.join(para.text for para in doc.paragraphs)
+            return read_docx_text(path)
         except ImportError:
-            print("Warning: python-docx not installed. Install with: pip install python-docx")
+            print("Warning: python-docx not installed. Install with: pip install python-docx (or use --docx-engine xml)")
             return path.read_text(encoding="utf-8", errors="ignore")
     return path.read_text(encoding="utf-8", errors="ignore")
 
@@ -78,11 +115,14 @@ def load_template(template_path: Path) -> str:
     return read_file(template_path)
 
 
-def build_prompt(transcript: str, template: str, transcript_id: str) -> List[dict]:
+def build_prompt_prefix(template: str) -> List[dict]:
     """
-    Build the prompt messages for OpenAI API based on Appendix F specification.
-    
-    Returns a list of message dicts with role and content.
+    Build the transcript-independent part of the prompt (Appendix F specification).
+
+    Returns [system_message, user_message] where the user message holds the
+    instructions and the template. Assemble it once per batch and pass it to
+    build_prompt(): every request then starts with the same long prefix, which
+    lets provider-side prompt caching skip re-processing it.
     """
     
     system_message = {
@@ -114,7 +154,7 @@ def build_prompt(transcript: str, template: str, transcript_id: str) -> List[dic
     
     user_message = {
         "role": "user",
-        "content": f"""I'm researching student–AI mathematical dialogue. Please analyze the attached transcript ({transcript_id}) using the Pirie–Kieren Work Analysis Protocol (PK-WAP) and generate a Deep Research–style memo that follows exactly the structure, headings, numbering, and formatting rules in the template below.
+        "content": f"""I'm researching student–AI mathematical dialogue. Please analyze the transcript at the end of this message using the Pirie–Kieren Work Analysis Protocol (PK-WAP) and generate a Deep Research–style memo that follows exactly the structure, headings, numbering, and formatting rules in the template below.
 
 The template rules are non-negotiable:
 - Section order, headings, and numbering must match exactly
@@ -136,6 +176,9 @@ Follow these steps:
 3. Highlight representative quotes from both student and AI (4–6 per side)
 4. Assess missed opportunities for AI to support deeper learning (1–2 sentences per item)
 5. Provide a summary that synthesizes growth, agency, and tone
+6. End with the JSON summary block described below
+
+{SCHEMA_PROMPT}
 
 Please take your time—it's okay if this takes several minutes to complete. The goal is a pedagogically insightful, deeply interpretive analysis in the exact format of the template.
 
@@ -144,7 +187,26 @@ TEMPLATE (follow this structure exactly):
 ---
 
 {template}
+"""
+    }
+    
+    return [system_message, user_message]
+
 
+def build_prompt(transcript: str, template: str, transcript_id: str,
+                 prefix: Optional[List[dict]] = None) -> List[dict]:
+    """
+    Build the prompt messages for OpenAI API based on Appendix F specification.
+    
+    The static prefix (see build_prompt_prefix) comes first and the transcript
+    last. Pass a prebuilt prefix to reuse it across a batch.
+    Returns a list of message dicts with role and content.
+    """
+    system_message, instructions = prefix or build_prompt_prefix(template)
+    
+    user_message = {
+        "role": "user",
+        "content": instructions["content"] + f"""
 ---
 TRANSCRIPT TO ANALYZE ({transcript_id}):
 ---
@@ -153,54 +215,267 @@ TRANSCRIPT TO ANALYZE ({transcript_id}):
 
 ---
 
-Generate the complete PK-WAP memo now, following the template structure exactly. Remember: code conservatively for outer PK layers.
+Generate the complete PK-WAP memo for {transcript_id} now, following the template structure exactly. Remember: code conservatively for outer PK layers.
 """
     }
     
     return [system_message, user_message]
 
 
+# ---------- Token budget + page-aligned chunking ----------
+_CJK_RE = re.compile("[\u3040-\u30FF\u3400-\u4DBF\u4E00-\u9FFF\uAC00-\uD7AF]")
+_encoders = {}
+
+
+def estimate_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """Token count for text: tiktoken when installed, else ~4 chars/token (1 per CJK character)."""
+    if tiktoken is not None:
+        name = model.split("/")[-1]
+        enc = _encoders.get(name)
+        if enc is None:
+            try:
+                try:
+                    enc = tiktoken.encoding_for_model(name)
+                except KeyError:
+                    enc = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                enc = False  # encoding files unavailable (e.g. offline): use the estimate
+            _encoders[name] = enc
+        if enc:
+            return len(enc.encode(text, disallowed_special=()))
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def estimate_messages_tokens(messages: List[dict], model: str = DEFAULT_MODEL) -> int:
+    return sum(estimate_tokens(m["content"], model) + 4 for m in messages) + 3
+
+
+def context_window(model: str, context_tokens: Optional[int] = None) -> int:
+    if context_tokens:
+        return context_tokens
+    return MODEL_CONTEXT_TOKENS.get(model.split("/")[-1], DEFAULT_CONTEXT_TOKENS)
+
+
+def prompt_budget(model: str, max_tokens: int, context_tokens: Optional[int] = None) -> int:
+    """Prompt tokens that fit next to a max_tokens completion, less a safety margin."""
+    window = context_window(model, context_tokens)
+    return int(window * (1 - BUDGET_MARGIN)) - max_tokens
+
+
+def _split_line(line: str, max_tokens: int, model: str = DEFAULT_MODEL) -> List[str]:
+    """Pieces of one line of at most max_tokens each, cut at a space where possible."""
+    pieces = []
+    while line and estimate_tokens(line, model) > max_tokens:
+        # longest prefix that fits (at least one character, so the loop always advances)
+        lo, hi = 1, len(line)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if estimate_tokens(line[:mid], model) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        cut = line.rfind(" ", 1, lo + 1)
+        if cut > 0:
+            pieces.append(line[:cut])
+            line = line[cut + 1:]
+        else:
+            pieces.append(line[:lo])
+            line = line[lo:]
+    if line or not pieces:
+        pieces.append(line)
+    return pieces
+
+
+def chunk_pages(transcript: str, max_chunk_tokens: int, model: str = DEFAULT_MODEL) -> List[dict]:
+    """
+    Split a transcript into page-aligned chunks of at most max_chunk_tokens.
+
+    Pages come from pk_screen_v2_2.split_pages (form feeds or "Page N" markers).
+    Whole pages are packed greedily; a single page larger than the budget is
+    split between lines, and a single line larger than the budget between
+    words (or inside a word). Each chunk is {"first_page", "last_page", "text"}
+    with "--- Page N ---" headers so page numbers survive into the prompt; the
+    headers and the newlines joining pages and lines count toward the budget.
+    """
+    chunks = []
+    cur, cur_tokens, first = [], 0, 1
+    join_tokens = estimate_tokens("\n\n", model)
+
+    def flush(last):
+        nonlocal cur, cur_tokens
+        if cur:
+            chunks.append({"first_page": first, "last_page": last, "text": "\n\n".join(cur)})
+        cur, cur_tokens = [], 0
+
+    page_no = 0
+    for page_no, page in enumerate(split_pages(normalize_text(transcript)), 1):
+        block = f"--- Page {page_no} ---\n{page}"
+        n = estimate_tokens(block, model)
+        if cur and cur_tokens + join_tokens + n > max_chunk_tokens:
+            flush(page_no - 1)
+        if not cur:
+            first = page_no
+        if n <= max_chunk_tokens:
+            cur_tokens += (join_tokens if cur else 0) + n
+            cur.append(block)
+            continue
+        # Oversized page (always starts a chunk): split between lines, and long lines between words
+        header, continued = f"--- Page {page_no} ---", f"--- Page {page_no} (continued) ---"
+        room = max(1, max_chunk_tokens - estimate_tokens(continued, model) - 1)
+        part, part_tokens = [header], estimate_tokens(header, model)
+        for ln in page.split("\n"):
+            for piece in _split_line(ln, room, model):
+                t = estimate_tokens(piece, model) + 1  # + the joining newline
+                if part_tokens + t > max_chunk_tokens and len(part) > 1:
+                    cur.append("\n".join(part))
+                    flush(page_no)
+                    first = page_no
+                    part, part_tokens = [continued], estimate_tokens(continued, model)
+                part.append(piece)
+                part_tokens += t
+        cur.append("\n".join(part))
+        cur_tokens = part_tokens
+    flush(page_no)
+    return chunks
+
+
+def build_chunk_prompt(prefix: List[dict], chunk: dict, transcript_id: str, index: int, total: int,
+                       max_words: Optional[int] = None) -> List[dict]:
+    """Map step: analyse one page range, reusing the shared prompt prefix."""
+    system_message, instructions = prefix
+    pages = f"pages {chunk['first_page']}–{chunk['last_page']}"
+    length = f" Keep these notes under about {max_words} words." if max_words else ""
+    return [system_message, {
+        "role": "user",
+        "content": instructions["content"] + f"""
+---
+TRANSCRIPT EXCERPT ({transcript_id}, part {index} of {total}, {pages}):
+---
+
+{chunk['text']}
+
+---
+
+This transcript is too long for one request, so it is being analysed in {total} parts and the parts will be merged afterwards. For {pages} ONLY, write PK-WAP analysis notes organised by the template's sections: per-page Word Count rows (Page | Student Words | AI Words | % Student Talk), recursive/folding-back moments, PK layer evidence, representative quotes with page numbers, and missed opportunities. Do not write an overall summary or totals, and do not append the JSON summary block (it is written when the parts are merged); report only what is in these pages.{length}
+"""
+    }]
+
+
+def build_reduce_prompt(prefix: List[dict], partials: List[str], chunks: List[dict], transcript_id: str) -> List[dict]:
+    """Reduce step: merge per-chunk notes into one memo in the template format."""
+    system_message, instructions = prefix
+    notes = "\n\n".join(
+        f"=== PART {i} (pages {c['first_page']}–{c['last_page']}) ===\n{text}"
+        for i, (c, text) in enumerate(zip(chunks, partials), 1)
+    )
+    return [system_message, {
+        "role": "user",
+        "content": instructions["content"] + f"""
+---
+PARTIAL ANALYSES OF {transcript_id} (the transcript was analysed in {len(partials)} page-aligned parts):
+---
+
+{notes}
+
+---
+
+Merge these partial analyses into ONE complete PK-WAP memo for {transcript_id}, following the template structure exactly. Combine the per-page Word Count rows into a single table and compute the totals from them, trace PK layer movement and folding back across the whole transcript, choose the 4–6 strongest quotes per side, and write one summary. End with the JSON summary block. Remember: code conservatively for outer PK layers.
+"""
+    }]
+
+
+def build_summary_prompt(prefix: List[dict], memo: str, transcript_id: str) -> List[dict]:
+    """Repair step: ask for the JSON summary of a finished memo that came back without a valid one."""
+    system_message, _instructions = prefix
+    return [system_message, {
+        "role": "user",
+        "content": f"""Below is a finished PK-WAP memo for {transcript_id}. Summarise it as one fenced ```json code block and nothing else. The block must contain a single JSON object with exactly these keys:
+{SCHEMA_SPEC}
+Take every value from the memo; do not re-analyse or add anything.
+
+---
+MEMO ({transcript_id}):
+---
+
+{memo}
+"""
+    }]
+
+
 def call_openai(
     messages: List[dict],
     model: str = DEFAULT_MODEL,
     temperature: float = DEFAULT_TEMPERATURE,
     max_tokens: int = DEFAULT_MAX_TOKENS,
-    use_openrouter: bool = False
+    use_openrouter: bool = False,
+    acquire: Optional[Callable[[], None]] = None
 ) -> str:
-    """Call OpenAI or OpenRouter API and return the response content."""
+    """Call OpenAI or OpenRouter API and return the response content.
+
+    Identical requests are answered from the response cache (see llm_cache.py).
+    The client and its connection pool are shared across calls (see llm_client.py).
+    acquire, if given, is called (and may block) right before each real API
+    request, e.g. to take a token from the batch rate limiter; cache hits skip it.
+    """
     import os
     
-    if use_openrouter:
-        # OpenRouter configuration
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-        )
-        print(f"  Calling OpenRouter API ({model}, temp={temperature})...")
-    else:
-        client = OpenAI()
-        print(f"  Calling OpenAI API ({model}, temp={temperature})...")
+    def create():
+        if acquire is not None:
+            acquire()
+        if use_openrouter:
+            # OpenRouter configuration
+            client = get_client(
+                base_url=OPENROUTER_BASE_URL,
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+            )
+            print(f"  Calling OpenRouter API ({model}, temp={temperature})...")
+        else:
+            client = get_client()
+            print(f"  Calling OpenAI API ({model}, temp={temperature})...")
+        
+        with track_request() as req:
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            record_usage(req, response)
+        
+        return response.choices[0].message.content.strip()
     
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        max_tokens=max_tokens
+    return cached_completion(
+        create, model=model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+        endpoint=resolve_base_url(OPENROUTER_BASE_URL if use_openrouter else None)
     )
-    
-    return response.choices[0].message.content.strip()
+
+
+def memo_path(output_path: Path, transcript_id: str) -> Path:
+    return output_path / f"{transcript_id}_PK-WAP.md"
 
 
 def save_memo(content: str, output_path: Path, transcript_id: str):
-    """Save the generated memo to a markdown file."""
+    """Save the generated memo to a markdown file (atomically, so --resume never sees half a memo)."""
     output_path.mkdir(parents=True, exist_ok=True)
     
-    memo_file = output_path / f"{transcript_id}_PK-WAP.md"
-    memo_file.write_text(content, encoding="utf-8")
+    memo_file = memo_path(output_path, transcript_id)
+    tmp = memo_file.with_name(memo_file.name + ".tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, memo_file)
     
     return memo_file
 
 
+def save_summary(summary: dict, memo_file: Path, memo_markdown: str, transcript_id: str, model: str) -> dict:
+    """Write the validated summary as the memo's JSON sidecar and append it to the corpus JSONL."""
+    record = make_record(transcript_id, memo_markdown, summary, model=model, memo_file=memo_file.name,
+                         generated_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    write_json_atomic(sidecar_path(memo_file), record)
+    append_corpus(memo_file.parent / CORPUS_FILE, record)
+    return record
+
+
 def process_transcript(
     transcript_path: Path,
     template_path: Path,
@@ -208,11 +483,25 @@ def process_transcript(
     model: str,
     temperature: float,
     max_tokens: int,
-    use_openrouter: bool = False
+    use_openrouter: bool = False,
+    prompt_prefix: Optional[List[dict]] = None,
+    context_tokens: Optional[int] = None,
+    acquire: Optional[Callable[[], None]] = None
 ) -> dict:
     """
     Process a single transcript through PK-WAP analysis.
     
+    prompt_prefix is the output of build_prompt_prefix(); batch runs build it
+    once and share it, otherwise the template is loaded here.
+    The prompt is sized before sending; a transcript that does not fit the
+    model's context window (or context_tokens) next to max_tokens of output is
+    analysed in page-aligned chunks and merged in a final reduce call; each
+    chunk's output is capped so that all partial analyses fit the reduce prompt,
+    and a transcript needing too many chunks fails before any call is made.
+    acquire is passed to call_openai() for every API request (rate limiting).
+    The memo's trailing JSON summary is validated (see memo_schema.py) and
+    saved as a sidecar plus a line in the corpus JSONL; if it is missing or
+    invalid, one short follow-up call asks for it again from the memo alone.
     Returns a dict with status info.
     """
     transcript_id = transcript_path.stem  # e.g., "P28-G16-S5"
@@ -220,21 +509,96 @@ def process_transcript(
     print(f"\nProcessing: {transcript_id}")
     print(f"  Loading transcript from {transcript_path}...")
     
+    usage = {"api_calls": 0, "cached_response": True, "api_latency_seconds": 0.0,
+             "connections_opened": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0,
+             "completion_tokens": 0}
+    
+    def ask(messages, limit=max_tokens):
+        take_last_request()
+        content = call_openai(messages, model, temperature, limit, use_openrouter, acquire=acquire)
+        api = take_last_request()  # None when the response came from the cache
+        if api:
+            usage["api_calls"] += 1
+            usage["cached_response"] = False
+            usage["api_latency_seconds"] += api["latency_seconds"]
+            for k in ("connections_opened", "prompt_tokens", "cached_prompt_tokens", "completion_tokens"):
+                usage[k] += api[k]
+        return content
+    
+    plan = {}
     try:
         # Load files
         transcript = read_file(transcript_path)
-        template = load_template(template_path)
+        if prompt_prefix is None:
+            prompt_prefix = build_prompt_prefix(load_template(template_path))
         
-        # Build prompt
-        messages = build_prompt(transcript, template, transcript_id)
+        # Build prompt and check it against the token budget
+        messages = build_prompt(transcript, None, transcript_id, prefix=prompt_prefix)
+        budget = prompt_budget(model, max_tokens, context_tokens)
+        estimate = estimate_messages_tokens(messages, model)
+        plan = {"estimated_prompt_tokens": estimate, "prompt_budget": budget, "chunks": 1}
         
-        # Call API
         start_time = time.time()
-        memo_content = call_openai(messages, model, temperature, max_tokens, use_openrouter)
+        if estimate <= budget:
+            # Call API
+            memo_content = ask(messages)
+        else:
+            # Map: page-aligned chunks that each fit next to the shared prefix
+            overhead = estimate_messages_tokens(build_chunk_prompt(
+                prompt_prefix, {"first_page": 0, "last_page": 0, "text": ""}, transcript_id, 1, 1,
+                max_words=max_tokens), model)
+            if overhead >= budget:
+                raise ValueError(f"prompt budget exceeded: template and instructions alone need ~{overhead} "
+                                 f"tokens, budget is {budget} (lower --max-tokens or raise --context-tokens)")
+            chunks = chunk_pages(transcript, budget - overhead, model)
+            plan["chunks"] = len(chunks)
+            # Size the reduce step before spending any calls: cap each partial's output so
+            # all of them fit in the merge prompt next to the template and instructions
+            reduce_overhead = estimate_messages_tokens(
+                build_reduce_prompt(prompt_prefix, [""] * len(chunks), chunks, transcript_id), model)
+            partial_cap = min(max_tokens, (budget - reduce_overhead) // len(chunks))
+            min_partial = min(MIN_PARTIAL_TOKENS, max_tokens)
+            if partial_cap < min_partial:
+                raise ValueError(f"prompt budget exceeded: merging {len(chunks)} partial analyses leaves "
+                                 f"~{max(partial_cap, 0)} tokens per part (minimum {min_partial}), "
+                                 f"budget is {budget} (lower --max-tokens or raise --context-tokens)")
+            plan["partial_max_tokens"] = partial_cap
+            print(f"  Prompt ~{estimate} tokens > budget {budget}: analysing in {len(chunks)} page-aligned chunks "
+                  f"(≤{partial_cap} output tokens each)")
+            partials = []
+            for i, chunk in enumerate(chunks, 1):
+                print(f"  [chunk {i}/{len(chunks)}] pages {chunk['first_page']}–{chunk['last_page']}")
+                partials.append(ask(build_chunk_prompt(prompt_prefix, chunk, transcript_id, i, len(chunks),
+                                                       max_words=partial_cap * 3 // 4),
+                                    limit=partial_cap))
+            # Reduce: one memo from the partial analyses
+            reduce_messages = build_reduce_prompt(prompt_prefix, partials, chunks, transcript_id)
+            reduce_estimate = estimate_messages_tokens(reduce_messages, model)
+            if reduce_estimate > budget:
+                raise ValueError(f"prompt budget exceeded: merging {len(chunks)} partial analyses needs "
+                                 f"~{reduce_estimate} tokens, budget is {budget}")
+            print(f"  [reduce] merging {len(chunks)} partial analyses")
+            memo_content = ask(reduce_messages)
+        
+        # Structured summary: split off and validate, one repair call if needed
+        memo_content, raw_summary = split_memo(memo_content)
+        summary, summary_errors = parse_summary(raw_summary)
+        summary_repaired = False
+        if summary is None:
+            print(f"  Summary block unusable ({summary_errors[0]}); requesting it from the memo")
+            repaired = ask(build_summary_prompt(prompt_prefix, memo_content, transcript_id))
+            _, raw_summary = split_memo(repaired)
+            summary, summary_errors = parse_summary(raw_summary)
+            summary_repaired = summary is not None
         elapsed = time.time() - start_time
         
         # Save output
         memo_file = save_memo(memo_content, output_dir, transcript_id)
+        if summary is not None:
+            save_summary(summary, memo_file, memo_content, transcript_id, model)
+        else:
+            sidecar_path(memo_file).unlink(missing_ok=True)  # never leave a stale sidecar next to a new memo
+            print(f"  ⚠ No valid JSON summary: {'; '.join(summary_errors[:3])}")
         
         print(f"  ✓ Complete in {elapsed:.1f}s")
         print(f"  Saved to: {memo_file}")
@@ -244,18 +608,249 @@ def process_transcript(
             "status": "success",
             "output_file": str(memo_file),
             "elapsed_seconds": elapsed,
-            "memo_length": len(memo_content)
+            "memo_length": len(memo_content),
+            "structured": summary is not None,
+            "summary_repaired": summary_repaired,
+            **({"summary_errors": summary_errors[:5]} if summary is None else {}),
+            **plan,
+            **usage
         }
         
     except Exception as e:
         print(f"  ✗ Error: {e}")
+        ask_failed = take_last_request()
+        if ask_failed:
+            usage["api_calls"] += 1
+            usage["api_latency_seconds"] += ask_failed["latency_seconds"]
+            usage["connections_opened"] += ask_failed["connections_opened"]
         return {
             "transcript_id": transcript_id,
             "status": "error",
-            "error": str(e)
+            "error": str(e),
+            **plan,
+            "api_calls": usage["api_calls"],
+            "api_latency_seconds": usage["api_latency_seconds"],
+            "connections_opened": usage["connections_opened"]
         }
 
 
+def write_json_atomic(path: Path, data) -> None:
+    """Write JSON via a temp file + rename so a crash never leaves a half-written log."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second on average, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def load_log_records(log_file: Path) -> List[dict]:
+    """Records from a previous run: the .jsonl progress log, else the .json summary."""
+    records = []
+    progress = log_file.with_suffix(".jsonl")
+    if progress.exists():
+        with open(progress) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # torn last line from an interrupted run
+    elif log_file.exists():
+        try:
+            records = json.loads(log_file.read_text())
+        except ValueError:
+            pass
+    return [r for r in records if isinstance(r, dict) and "transcript_id" in r]
+
+
+def memo_is_complete(output_dir: Path, transcript_id: str, record: Optional[dict], corpus: dict) -> bool:
+    """
+    True when a previous run finished this transcript: its latest log record (if
+    any) is a success, the memo is non-empty and its JSON sidecar describes that
+    exact memo (memo_sha256). A valid sidecar missing from the corpus JSONL is
+    appended to it again rather than re-running the transcript.
+    """
+    if record is not None and (record.get("status") != "success" or record.get("structured") is False):
+        return False
+    memo_file = memo_path(output_dir, transcript_id)
+    try:
+        memo = memo_file.read_bytes()
+        sidecar = json.loads(sidecar_path(memo_file).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if not memo or not isinstance(sidecar, dict) or sidecar.get("memo_sha256") != hashlib.sha256(memo).hexdigest():
+        return False
+    if corpus.get(transcript_id, {}).get("memo_sha256") != sidecar["memo_sha256"]:
+        append_corpus(output_dir / CORPUS_FILE, sidecar)
+    return True
+
+
+async def _run_transcripts_async(transcript_files, progress, concurrency, rpm, burst, job_kwargs):
+    total = len(transcript_files)
+    results = [None] * total
+    finished = 0
+    limit = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rpm / 60.0, burst) if rpm > 0 else None
+    loop = asyncio.get_running_loop()
+
+    def acquire():
+        # called from worker threads before every API request (chunk, reduce and repair calls included)
+        asyncio.run_coroutine_threadsafe(bucket.acquire(), loop).result()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        async def run_one(idx, transcript_path):
+            nonlocal finished
+            async with limit:
+                print(f"\n[{idx + 1}/{total}]", end=" ")
+                job = functools.partial(process_transcript, transcript_path,
+                                        acquire=acquire if bucket else None, **job_kwargs)
+                result = await loop.run_in_executor(pool, job)
+            # Runs on the event loop thread, so log appends never interleave
+            results[idx] = result
+            finished += 1
+            progress.write(json.dumps(result) + "\n")
+            progress.flush()
+            os.fsync(progress.fileno())
+            if concurrency > 1:
+                print(f"  ({finished}/{total} finished: {result['transcript_id']} {result['status']})")
+
+        await asyncio.gather(*(run_one(i, p) for i, p in enumerate(transcript_files)))
+    return results
+
+
+def run_transcripts(
+    transcript_files: List[Path],
+    log_file: Path,
+    template_path: Path,
+    output_dir: Path,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    use_openrouter: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rpm: float = DEFAULT_RPM,
+    burst: int = 1,
+    resume: bool = False,
+    context_tokens: Optional[int] = None
+) -> List[dict]:
+    """
+    Process transcripts with up to `concurrency` API calls in flight.
+
+    Every API request (single, chunk, reduce and summary-repair calls alike) is
+    paced by one token bucket (`rpm` requests per minute, bursts of `burst`;
+    rpm <= 0 disables pacing); cache hits are not counted. Each finished transcript is appended to
+    the JSON Lines progress log (log_file with a .jsonl suffix); the JSON summary
+    at log_file is written atomically, in input order, once the run ends.
+
+    With resume=True, transcripts that are complete (memo_is_complete: latest
+    log record a success, memo plus matching JSON sidecar on disk) are skipped
+    and keep their earlier log record; everything else (earlier failures, memos
+    without a valid summary, never reached) is processed, and the progress log
+    is appended to instead of started over.
+    """
+    prior = {}
+    todo = list(transcript_files)
+    if resume:
+        for rec in load_log_records(log_file):
+            prior[rec["transcript_id"]] = rec  # latest attempt wins
+        corpus = load_corpus(output_dir / CORPUS_FILE)
+        todo = [p for p in transcript_files
+                if not memo_is_complete(output_dir, p.stem, prior.get(p.stem), corpus)]
+        retrying = sum(1 for p in todo if prior.get(p.stem, {}).get("status") == "error")
+        print(f"Resume: {len(transcript_files) - len(todo)} already complete, {len(todo)} to process "
+              f"({retrying} earlier failure(s))")
+
+    # Template + static instructions are assembled once and shared by every request
+    prompt_prefix = build_prompt_prefix(load_template(template_path)) if todo else None
+
+    job_kwargs = dict(
+        prompt_prefix=prompt_prefix,
+        template_path=template_path,
+        output_dir=output_dir,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        use_openrouter=use_openrouter,
+        context_tokens=context_tokens,
+    )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(log_file.with_suffix(".jsonl"), "a" if resume else "w") as progress:
+        fresh = asyncio.run(_run_transcripts_async(
+            todo, progress, max(1, concurrency), rpm, burst, job_kwargs
+        ))
+
+    by_id = {r["transcript_id"]: r for r in fresh}
+    results = []
+    for p in transcript_files:
+        if p.stem in by_id:
+            results.append(by_id[p.stem])
+        else:
+            rec = prior.get(p.stem) or {
+                "transcript_id": p.stem,
+                "status": "success",
+                "output_file": str(memo_path(output_dir, p.stem)),
+            }
+            results.append(dict(rec, skipped=True))
+    write_json_atomic(log_file, results)
+    return results
+
+
+def print_batch_summary(results: List[dict], log_file: Path, title: str, wall_seconds: float):
+    print("\n" + "="*60)
+    print(title)
+    print("="*60)
+
+    skipped = sum(1 for r in results if r.get("skipped"))
+    ran = [r for r in results if not r.get("skipped")]
+    successful = sum(1 for r in ran if r["status"] == "success")
+    failed = len(ran) - successful
+
+    print(f"Total processed: {len(ran)}")
+    if skipped:
+        print(f"Skipped (already complete): {skipped}")
+    print(f"Successful: {successful}")
+    print(f"Failed: {failed}")
+
+    if successful > 0:
+        total_time = sum(r.get("elapsed_seconds", 0) for r in ran if r["status"] == "success")
+        avg_time = total_time / successful
+        print(f"Average time per memo: {avg_time:.1f}s")
+    print(f"Wall time: {wall_seconds:.1f}s")
+    if llm_cache.stats["hits"]:
+        print(f"Response cache: {llm_cache.stats['hits']} hit(s), {llm_cache.stats['misses']} API call(s)")
+    api = llm_client.stats
+    if api["requests"]:
+        print(f"API requests: {api['requests']}, mean latency {api['latency_seconds'] / api['requests']:.1f}s, "
+              f"{api['connections']} new connection(s) across {api['clients']} client(s)")
+        if api["prompt_tokens"]:
+            cached = api["cached_prompt_tokens"]
+            print(f"Input tokens: {api['prompt_tokens']} ({cached} cached by the provider, "
+                  f"{100.0 * cached / api['prompt_tokens']:.0f}%; {api['prompt_tokens'] - cached} uncached)")
+
+    print(f"\nLog saved to: {log_file}")
+
+
 def batch_process(
     transcript_dir: Path,
     template_path: Path,
@@ -264,7 +859,12 @@ def batch_process(
     temperature: float,
     max_tokens: int,
     limit: Optional[int] = None,
-    use_openrouter: bool = False
+    use_openrouter: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rpm: float = DEFAULT_RPM,
+    burst: int = 1,
+    resume: bool = False,
+    context_tokens: Optional[int] = None
 ):
     """Process multiple transcripts in batch."""
     
@@ -279,51 +879,18 @@ def batch_process(
         transcript_files = transcript_files[:limit]
     
     print(f"Found {len(transcript_files)} transcript(s) to process")
+    if concurrency > 1:
+        print(f"Concurrency: {concurrency}, rate limit: {rpm:g} requests/min")
     
-    results = []
-    
-    for i, transcript_path in enumerate(transcript_files, 1):
-        print(f"\n[{i}/{len(transcript_files)}]", end=" ")
-        
-        result = process_transcript(
-            transcript_path,
-            template_path,
-            output_dir,
-            model,
-            temperature,
-            max_tokens,
-            use_openrouter
-        )
-        
-        results.append(result)
-        
-        # Save progress log
-        log_file = output_dir / "pkwap_batch_log.json"
-        with open(log_file, "w") as f:
-            json.dump(results, f, indent=2)
-        
-        # Rate limiting
-        if i < len(transcript_files):
-            time.sleep(BATCH_SLEEP)
-    
-    # Summary
-    print("\n" + "="*60)
-    print("BATCH PROCESSING COMPLETE")
-    print("="*60)
-    
-    successful = sum(1 for r in results if r["status"] == "success")
-    failed = len(results) - successful
-    
-    print(f"Total processed: {len(results)}")
-    print(f"Successful: {successful}")
-    print(f"Failed: {failed}")
-    
-    if successful > 0:
-        total_time = sum(r.get("elapsed_seconds", 0) for r in results if r["status"] == "success")
-        avg_time = total_time / successful
-        print(f"Average time per memo: {avg_time:.1f}s")
-    
-    print(f"\nLog saved to: {log_file}")
+    log_file = output_dir / "pkwap_batch_log.json"
+    start_time = time.time()
+    results = run_transcripts(
+        transcript_files, log_file, template_path, output_dir,
+        model, temperature, max_tokens, use_openrouter,
+        concurrency=concurrency, rpm=rpm, burst=burst, resume=resume,
+        context_tokens=context_tokens
+    )
+    print_batch_summary(results, log_file, "BATCH PROCESSING COMPLETE", time.time() - start_time)
 
 
 def main():
@@ -338,6 +905,12 @@ Examples:
   # Batch process (first 10)
   python3 pkwap_analyzer.py --batch transcripts/ --output memos/ --limit 10
   
+  # Batch process, 8 transcripts at a time, at most 60 requests/minute
+  python3 pkwap_analyzer.py --batch transcripts/ --output memos/ --concurrency 8 --rpm 60
+  
+  # Continue an interrupted batch: only missing/failed memos are generated
+  python3 pkwap_analyzer.py --batch transcripts/ --output memos/ --resume
+  
   # Custom model settings
   python3 pkwap_analyzer.py --transcript P28.txt --model gpt-4-turbo --temperature 0.3
         """
@@ -401,6 +974,12 @@ Examples:
         default=DEFAULT_MAX_TOKENS,
         help=f"Maximum tokens in response (default: {DEFAULT_MAX_TOKENS})"
     )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        help=f"Model context window used for the prompt budget (default: known per model, else {DEFAULT_CONTEXT_TOKENS}). "
+             "Transcripts that do not fit are analysed in page-aligned chunks and merged."
+    )
     
     # Batch options
     parser.add_argument(
@@ -408,6 +987,30 @@ Examples:
         type=int,
         help="Limit number of transcripts to process (for testing)"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Transcripts to analyze at once in --batch/--cases mode (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=DEFAULT_RPM,
+        help=f"Maximum API requests per minute, token-bucket paced (default: {DEFAULT_RPM:g}; 0 = unlimited)"
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=1,
+        help="Requests allowed to start back-to-back before --rpm pacing applies (default: 1)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip transcripts already complete in --output (successful log record, memo and matching JSON "
+             "summary), retry everything else, and append to the log"
+    )
     
     # OpenRouter option
     parser.add_argument(
@@ -415,8 +1018,31 @@ Examples:
         action="store_true",
         help="Use OpenRouter API instead of OpenAI directly (requires OPENROUTER_API_KEY)"
     )
+    parser.add_argument(
+        "--docx-engine",
+        choices=sorted(DOCX_ENGINES),
+        help="How to extract .docx transcripts: python-docx (default) or xml (no python-docx needed; parity checked by validate_docx_text.py)"
+    )
+    parser.add_argument(
+        "--cache-mode",
+        choices=CACHE_MODES,
+        help="API response cache: auto (read at temperature 0, else off; default), read (reuse + store), write (refresh), off"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help=f"Per-request read timeout in seconds (default: {llm_client.DEFAULT_TIMEOUT:g})"
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        help=f"Connection timeout in seconds (default: {llm_client.DEFAULT_CONNECT_TIMEOUT:g})"
+    )
     
     args = parser.parse_args()
+    set_docx_engine(args.docx_engine)
+    set_cache_mode(args.cache_mode)
+    set_timeouts(args.timeout, args.connect_timeout)
     
     # Validate API key
     import os
@@ -447,7 +1073,8 @@ Examples:
             args.model,
             args.temperature,
             args.max_tokens,
-            args.openrouter
+            args.openrouter,
+            context_tokens=args.context_tokens
         )
     elif args.cases:
         # Specific cases mode
@@ -477,45 +1104,15 @@ Examples:
         
         print(f"Found {len(transcript_files)} transcript(s) for specified cases")
         
-        results = []
-        for i, transcript_path in enumerate(transcript_files, 1):
-            print(f"\n[{i}/{len(transcript_files)}]", end=" ")
-            
-            result = process_transcript(
-                transcript_path,
-                args.template,
-                args.output,
-                args.model,
-                args.temperature,
-                args.max_tokens,
-                args.openrouter
-            )
-            
-            results.append(result)
-            
-            # Save progress log
-            log_file = args.output / "pkwap_cases_log.json"
-            with open(log_file, "w") as f:
-                json.dump(results, f, indent=2)
-            
-            # Rate limiting
-            if i < len(transcript_files):
-                time.sleep(BATCH_SLEEP)
-        
-        # Summary
-        print("\n" + "="*60)
-        print("CASE PROCESSING COMPLETE")
-        print("="*60)
-        successful = sum(1 for r in results if r["status"] == "success")
-        failed = len(results) - successful
-        print(f"Total processed: {len(results)}")
-        print(f"Successful: {successful}")
-        print(f"Failed: {failed}")
-        if successful > 0:
-            total_time = sum(r.get("elapsed_seconds", 0) for r in results if r["status"] == "success")
-            avg_time = total_time / successful
-            print(f"Average time per memo: {avg_time:.1f}s")
-        print(f"\nLog saved to: {log_file}")
+        log_file = args.output / "pkwap_cases_log.json"
+        start_time = time.time()
+        results = run_transcripts(
+            transcript_files, log_file, args.template, args.output,
+            args.model, args.temperature, args.max_tokens, args.openrouter,
+            concurrency=args.concurrency, rpm=args.rpm, burst=args.burst, resume=args.resume,
+            context_tokens=args.context_tokens
+        )
+        print_batch_summary(results, log_file, "CASE PROCESSING COMPLETE", time.time() - start_time)
     else:
         # Batch mode
         if not args.batch.is_dir():
@@ -530,7 +1127,12 @@ Examples:
             args.temperature,
             args.max_tokens,
             args.limit,
-            args.openrouter
+            args.openrouter,
+            concurrency=args.concurrency,
+            rpm=args.rpm,
+            burst=args.burst,
+            resume=args.resume,
+            context_tokens=args.context_tokens
         )
 
 
@@ -8,11 +8,20 @@ image analysis provides meaningful additional insights.
 
 Usage:
   python3 pkwap_vision_analyzer.py --case P93-G1-S4 --compare
+  python3 pkwap_vision_analyzer.py --cases P93-G1-S4 P7-GX-SX --concurrency 3
+  python3 pkwap_vision_analyzer.py --cases-file anchors.txt --log vision_log.json
 
 Requirements:
   - OPENROUTER_API_KEY in environment or .env file
   - PNG scans in Data/Raw/Raw PNG files/
   - Naming_CodesDONOT_TRASH.csv for code-to-folder mapping
+  - Optional: pillow, to downscale pages to --max-pixels before upload
+
+Case lookups (transcript, PNG folder, pages) come from an index saved to
+VISION_CASE_INDEX (default ~/.cache/tea-pkwap/vision_case_index.json) and
+rebuilt when the naming CSV or the PNG/transcript folders change.
+Prepared page images are cached in VISION_CACHE_DIR (default
+~/.cache/tea-pkwap/vision_images, capped at VISION_CACHE_MAX_MB, default 512).
 """
 
 import argparse
@@ -21,6 +30,12 @@ import time
 import os
 import base64
 import csv
+import hashlib
+import importlib.util
+import io
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, List, Dict
 import json
@@ -35,17 +50,31 @@ if env_file.exists():
                 key, value = line.split("=", 1)
                 os.environ.setdefault(key.strip(), value.strip())
 
-try:
-    from openai import OpenAI
-except ImportError:
+# llm_client imports openai on first use; fail here, before any work, if it is missing
+if importlib.util.find_spec("openai") is None:
     print("Error: OpenAI package not installed.")
     print("Install with: pip install openai")
     sys.exit(1)
 
+from cache_utils import evict
+from docx_cache import DOCX_ENGINES, read_docx_text, set_docx_engine
+from llm_cache import CACHE_MODES, cached_completion, set_cache_mode
+import llm_client
+from llm_client import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_TIMEOUT, get_client, record_usage, resolve_base_url,
+                        set_timeouts, take_last_request, track_request)
+
+# Optional: Pillow for downscaling/recompressing page images (sent as-is without it)
+try:
+    from PIL import Image
+except Exception:
+    Image = None
+
 # Configuration
 DEFAULT_MODEL = "openai/gpt-4o"
 DEFAULT_TEMPERATURE = 0.2
 DEFAULT_MAX_TOKENS = 16000
+DEFAULT_CONCURRENCY = 3  # cases analyzed at once in --cases batch mode
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 # Paths - adjust these as needed
 CHAPTER_REPO = Path("/home/todd/TEA-repos/TEA-Taylor-Series-Chapter")
@@ -56,28 +85,75 @@ NAMING_CSV = CHAPTER_REPO / "Data/Raw/Naming_CodesDONOT_TRASH.csv"
 TEMPLATE_PATH = PAPER_REPO / "Templates/P00-G00-S0 PK-WAP TEMPLATE.md"
 OUTPUT_DIR = CHAPTER_REPO / "Analysis/anchor_memos_vision_comparison"
 
+# Image preprocessing. With detail=high the API fits a page into 2048x2048 and then
+# scales its short side to 768 px, so a 200-DPI letter scan (~1700x2200) is read at
+# ~768x994; pages are downscaled to this pixel budget before upload.
+DEFAULT_MAX_PIXELS = 1_000_000
+DEFAULT_IMAGE_FORMAT = "png"   # png (lossless) or jpeg
+JPEG_QUALITY = 85
+IMAGE_WORKERS = 4
+IMAGE_CACHE_DIR = Path(os.environ.get("VISION_CACHE_DIR", "") or Path.home() / ".cache" / "tea-pkwap" / "vision_images").expanduser()
+DEFAULT_IMAGE_CACHE_MAX_MB = 512.0
+IMAGE_CACHE_GLOBS = ("*/*.png", "*/*.jpg")  # entry files of both formats share one budget
+IMAGE_CACHE_VERSION = 3  # part of the entry key; bump when prepare_image's output changes
+
+
+def _image_cache_max_mb() -> float:
+    raw = os.environ.get("VISION_CACHE_MAX_MB", "")
+    if not raw.strip():
+        return DEFAULT_IMAGE_CACHE_MAX_MB
+    try:
+        mb = float(raw)
+        if math.isfinite(mb) and mb >= 0:
+            return mb
+    except ValueError:
+        pass
+    print(f"Warning: VISION_CACHE_MAX_MB={raw!r} is not a size in MB; using {DEFAULT_IMAGE_CACHE_MAX_MB:g}",
+          file=sys.stderr)
+    return DEFAULT_IMAGE_CACHE_MAX_MB
+
+
+IMAGE_CACHE_MAX_MB = _image_cache_max_mb()
+
+# Case index: case ID -> transcript, PNG folder and page files, rebuilt when the
+# naming CSV or the PNG / transcript directory listings change.
+CASE_INDEX_PATH = Path(os.environ.get("VISION_CASE_INDEX", "") or Path.home() / ".cache" / "tea-pkwap" / "vision_case_index.json").expanduser()
+CASE_INDEX_VERSION = 1
+
+
+_naming_cache = {}
+
 
 def load_naming_mapping() -> Dict[str, str]:
-    """Load the P-code to folder name mapping from CSV."""
+    """Load the P-code to folder name mapping from CSV (read once per CSV version)."""
+    try:
+        version = NAMING_CSV.stat().st_mtime_ns
+    except OSError:
+        return {}
+    if _naming_cache.get("version") == version:
+        return _naming_cache["mapping"]
     mapping = {}
-    if NAMING_CSV.exists():
-        with open(NAMING_CSV, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) >= 2:
-                    name = row[0].strip().replace("\\_", "_")
-                    code = row[1].strip()
-                    mapping[code] = name
+    with open(NAMING_CSV, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        for row in reader:
+            if len(row) >= 2:
+                name = row[0].strip().replace("\\_", "_")
+                code = row[1].strip()
+                mapping[code] = name
+    _naming_cache.update(version=version, mapping=mapping)
     return mapping
 
 
-def find_png_folder(case_id: str, naming_map: Dict[str, str]) -> Optional[Path]:
+def find_png_folder(case_id: str, naming_map: Dict[str, str], folders: Optional[List[Path]] = None,
+                    verbose: bool = True) -> Optional[Path]:
     """
     Find the PNG folder for a given case ID.
     
     The folder naming is like "Group 1, Section 4, Huang Yuran"
     The case_id is like "P93-G1-S4"
     The naming_map entry is like "Yuan_KuangdiG1S4" -> "P93-G1-S4"
+    
+    folders: subfolders of PNG_DIR already listed by the caller (listed here if None).
     """
     # Parse case_id
     parts = case_id.split("-")
@@ -102,23 +178,25 @@ def find_png_folder(case_id: str, naming_map: Dict[str, str]) -> Optional[Path]:
     # Replace underscores with spaces
     name_part = name_part.replace("_", " ")
     
-    print(f"  Looking for name '{name_part}' in Group {group}, Section {section}")
+    if verbose:
+        print(f"  Looking for name '{name_part}' in Group {group}, Section {section}")
+    
+    if folders is None:
+        folders = [f for f in PNG_DIR.iterdir() if f.is_dir()] if PNG_DIR.exists() else []
     
     # Search for matching folder
-    if PNG_DIR.exists():
-        for folder in PNG_DIR.iterdir():
-            if folder.is_dir():
-                folder_name = folder.name
-                # Check if group/section match
-                group_match = f"Group {group}," in folder_name if group else "Group Unknown" in folder_name
-                section_match = f"Section {section}," in folder_name if section else "Section Unknown" in folder_name
-                
-                if group_match and section_match:
-                    # Check name (partial match - any word from name_part)
-                    name_words = name_part.lower().split()
-                    folder_lower = folder_name.lower()
-                    if any(word in folder_lower for word in name_words):
-                        return folder
+    for folder in folders:
+        folder_name = folder.name
+        # Check if group/section match
+        group_match = f"Group {group}," in folder_name if group else "Group Unknown" in folder_name
+        section_match = f"Section {section}," in folder_name if section else "Section Unknown" in folder_name
+        
+        if group_match and section_match:
+            # Check name (partial match - any word from name_part)
+            name_words = name_part.lower().split()
+            folder_lower = folder_name.lower()
+            if any(word in folder_lower for word in name_words):
+                return folder
     
     return None
 
@@ -129,54 +207,144 @@ def encode_image_base64(image_path: Path) -> str:
         return base64.b64encode(f.read()).decode('utf-8')
 
 
-def load_png_images(png_folder: Path, max_images: int = 10) -> List[Dict]:
-    """Load PNG images from folder, return list of image content dicts."""
-    images = []
-    png_files = sorted(png_folder.glob("*.png"))[:max_images]
+def _flatten_alpha(img):
+    """Composite a page with transparency onto white (JPEG has no alpha; convert() alone makes it black)."""
+    if img.mode not in ("RGBA", "LA", "PA") and not (img.mode == "P" and "transparency" in img.info):
+        return img
+    rgba = img.convert("RGBA")
+    flat = Image.alpha_composite(Image.new("RGBA", rgba.size, (255, 255, 255, 255)), rgba).convert("RGB")
+    return flat.convert("L") if img.mode == "LA" else flat
+
+
+def prepare_image(image_path: Path, max_pixels: int = DEFAULT_MAX_PIXELS,
+                  image_format: str = DEFAULT_IMAGE_FORMAT) -> tuple:
+    """
+    Return (mime_type, image bytes) for one page, downscaled to max_pixels and recompressed.
+
+    Results are cached on disk under the sha256 of the file plus the settings, so
+    unchanged scans are not decoded and re-encoded on later runs. Without Pillow
+    (or with max_pixels=0 and png) the original file is sent unchanged.
+    """
+    data = image_path.read_bytes()
+    if Image is None or (max_pixels <= 0 and image_format == "png"):
+        return "image/png", data
+
+    ext = "jpg" if image_format == "jpeg" else "png"
+    settings = f"\0{max_pixels}\0{image_format}\0{JPEG_QUALITY}\0{IMAGE_CACHE_VERSION}"
+    key = hashlib.sha256(data + settings.encode()).hexdigest()
+    entry = IMAGE_CACHE_DIR / key[:2] / f"{key}.{ext}"
+    mime = f"image/{image_format}"
+    try:
+        out = entry.read_bytes()
+        os.utime(entry)  # mark as recently used
+        return mime, out
+    except OSError:
+        pass
+
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        w, h = img.size
+        resized = max_pixels > 0 and w * h > max_pixels
+        if resized:
+            scale = (max_pixels / (w * h)) ** 0.5
+            img = img.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.LANCZOS)
+        buf = io.BytesIO()
+        if image_format == "jpeg":
+            img = _flatten_alpha(img)
+            img.convert("L" if img.mode in ("L", "I;16") else "RGB").save(
+                buf, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        else:
+            img.save(buf, "PNG", optimize=True)
+    out = buf.getvalue()
+    if not resized and len(out) >= len(data) and image_format == "png":
+        out = data  # already small and not downscaled: keep the original bytes
+
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(out)
+        os.replace(tmp, entry)
+        evict(IMAGE_CACHE_DIR, int(IMAGE_CACHE_MAX_MB * 1024 * 1024), IMAGE_CACHE_GLOBS)
+    except OSError:
+        pass  # an unwritable cache must never break a run
+    return mime, out
+
+
+def load_png_images(png_folder: Path, max_images: int = 10, max_pixels: int = DEFAULT_MAX_PIXELS,
+                    image_format: str = DEFAULT_IMAGE_FORMAT, detail: str = "high",
+                    workers: int = IMAGE_WORKERS, pages: Optional[List[str]] = None) -> List[Dict]:
+    """Load PNG images from folder, return list of image content dicts (pages prepared in a thread pool).
+    
+    pages: sorted page file names from the case index (the folder is listed if None).
+    """
+    if pages is None:
+        png_files = sorted(png_folder.glob("*.png"))[:max_images]
+    else:
+        png_files = [png_folder / name for name in pages[:max_images]]
+    if Image is None and max_pixels > 0:
+        print("  Note: Pillow not installed; sending full-size images (pip install pillow)")
+    
+    def prepare(png_file):
+        return prepare_image(png_file, max_pixels, image_format)
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        prepared = list(pool.map(prepare, png_files))
     
-    for png_file in png_files:
-        base64_image = encode_image_base64(png_file)
+    images = []
+    for mime, data in prepared:
         images.append({
             "type": "image_url",
             "image_url": {
-                "url": f"data:image/png;base64,{base64_image}",
-                "detail": "high"
+                "url": f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}",
+                "detail": detail
             }
         })
     
     return images
 
 
-def find_transcript(case_id: str) -> Optional[Path]:
-    """Find the transcript file for a case - handles S6 vs SX naming convention."""
+def find_transcript(case_id: str, entries: Optional[List[Path]] = None) -> Optional[Path]:
+    """Find the transcript file for a case - handles S6 vs SX naming convention.
+    
+    entries: files in TRANSCRIPT_DIR already listed by the caller (probed on disk if None).
+    """
     # Extract P-number for flexible matching
     p_num = case_id.split('-')[0]  # e.g., "P119"
+    by_name = {f.name: f for f in entries} if entries is not None else None
+    
+    def probe(stem):
+        for ext in ['.txt', '.docx']:
+            if by_name is not None:
+                if f"{stem}{ext}" in by_name:
+                    return by_name[f"{stem}{ext}"]
+                continue
+            path = TRANSCRIPT_DIR / f"{stem}{ext}"
+            if path.exists():
+                return path
+        return None
     
     # First try exact match
-    for ext in ['.txt', '.docx']:
-        path = TRANSCRIPT_DIR / f"{case_id}{ext}"
-        if path.exists():
-            return path
+    path = probe(case_id)
+    if path:
+        return path
     
     # For GX-SX cases, try with S6 instead
     if '-SX' in case_id:
-        alt_id = case_id.replace('-SX', '-S6')
-        for ext in ['.txt', '.docx']:
-            path = TRANSCRIPT_DIR / f"{alt_id}{ext}"
-            if path.exists():
-                return path
+        path = probe(case_id.replace('-SX', '-S6'))
+        if path:
+            return path
     
     # For GX-SX cases with section X, try G#-S# variations  
     if '-GX-' in case_id:
         # Try P##-GX-S6
-        alt_id = case_id.replace('-GX-SX', '-GX-S6')
-        for ext in ['.txt', '.docx']:
-            path = TRANSCRIPT_DIR / f"{alt_id}{ext}"
-            if path.exists():
-                return path
+        path = probe(case_id.replace('-GX-SX', '-GX-S6'))
+        if path:
+            return path
     
     # Finally, do a prefix search (P## prefix)
-    for f in TRANSCRIPT_DIR.iterdir():
+    if entries is None:
+        entries = list(TRANSCRIPT_DIR.iterdir()) if TRANSCRIPT_DIR.exists() else []
+    for f in entries:
         if f.name.startswith(f"{p_num}-") and not "conflicted" in f.name.lower():
             if f.suffix.lower() in ['.txt', '.docx']:
                 return f
@@ -184,15 +352,112 @@ def find_transcript(case_id: str) -> Optional[Path]:
     return None
 
 
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _top_level_mtimes() -> tuple:
+    """mtimes of the naming CSV and the transcript / PNG directories (three stat calls)."""
+    return (str(NAMING_CSV), _mtime(NAMING_CSV), str(TRANSCRIPT_DIR), _mtime(TRANSCRIPT_DIR),
+            str(PNG_DIR), _mtime(PNG_DIR))
+
+
+def _index_signature(png_folders: List[Path]) -> dict:
+    """mtimes that change whenever a case folder, page or transcript is added, removed or renamed."""
+    return {
+        "version": CASE_INDEX_VERSION,
+        "naming_csv": [str(NAMING_CSV), _mtime(NAMING_CSV)],
+        "transcript_dir": [str(TRANSCRIPT_DIR), _mtime(TRANSCRIPT_DIR)],
+        "png_dir": [str(PNG_DIR), _mtime(PNG_DIR)],
+        "png_folders": {f.name: _mtime(f) for f in png_folders},
+    }
+
+
+def build_case_index(naming_map: Dict[str, str]) -> dict:
+    """Resolve every case in the naming map with one listing of each directory."""
+    png_folders = sorted(f for f in PNG_DIR.iterdir() if f.is_dir()) if PNG_DIR.exists() else []
+    transcripts = list(TRANSCRIPT_DIR.iterdir()) if TRANSCRIPT_DIR.exists() else []
+    cases = {}
+    for code in naming_map:
+        folder = find_png_folder(code, naming_map, png_folders, verbose=False)
+        transcript = find_transcript(code, transcripts)
+        cases[code] = {
+            "transcript": str(transcript) if transcript else None,
+            "png_folder": str(folder) if folder else None,
+            "pages": sorted(p.name for p in folder.glob("*.png")) if folder else [],
+        }
+    return {"signature": _index_signature(png_folders), "cases": cases}
+
+
+_case_index = None  # {"top": _top_level_mtimes(), "cases": {...}}, replaced whole under the lock
+_case_index_lock = threading.Lock()
+
+
+def load_case_index(rebuild: bool = False) -> dict:
+    """
+    Return {case_id: {"transcript", "png_folder", "pages"}}.
+    
+    The first call in a process checks the full signature (every case folder's
+    mtime) and loads CASE_INDEX_PATH, or rebuilds and saves it when stale. Later
+    calls are served from memory for three stat calls, and only repeat that
+    check when rebuild=True or the naming CSV / top-level directory mtimes change.
+    """
+    global _case_index
+    top = _top_level_mtimes()
+    state = _case_index
+    if not rebuild and state is not None and state["top"] == top:
+        return state["cases"]
+    
+    with _case_index_lock:
+        state = _case_index
+        if not rebuild and state is not None and state["top"] == top:
+            return state["cases"]  # another thread refreshed it meanwhile
+        png_folders = sorted(f for f in PNG_DIR.iterdir() if f.is_dir()) if PNG_DIR.exists() else []
+        signature = _index_signature(png_folders)
+        index = None
+        if not rebuild:
+            try:
+                index = json.loads(CASE_INDEX_PATH.read_text(encoding="utf-8"))
+                if index.get("signature") != signature:
+                    index = None
+            except (OSError, ValueError, AttributeError):
+                index = None
+        if index is None:
+            index = build_case_index(load_naming_mapping())
+            try:
+                CASE_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+                tmp = CASE_INDEX_PATH.with_name(f"{CASE_INDEX_PATH.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(index, indent=1, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp, CASE_INDEX_PATH)
+            except OSError:
+                pass  # still usable in memory
+        _case_index = {"top": top, "cases": index["cases"]}
+    return index["cases"]
+
+
+def lookup_case(case_id: str) -> dict:
+    """Index entry for case_id as paths; cases missing from the naming CSV are resolved directly."""
+    entry = load_case_index().get(case_id)
+    if entry is None:
+        transcript = find_transcript(case_id)
+        return {"transcript": transcript, "png_folder": None, "pages": []}
+    return {
+        "transcript": Path(entry["transcript"]) if entry["transcript"] else None,
+        "png_folder": Path(entry["png_folder"]) if entry["png_folder"] else None,
+        "pages": entry["pages"],
+    }
+
+
 def read_file(path: Path) -> str:
     """Read text or docx file."""
     if path.suffix.lower() == '.docx':
         try:
-            from docx import Document
-            doc = Document(path)
-            return '\n'.join(para.text for para in doc.paragraphs)
+            return read_docx_text(path)
         except ImportError:
-            print("Warning: python-docx not installed")
+            print("Warning: python-docx not installed (use --docx-engine xml)")
             return path.read_text(encoding="utf-8", errors="ignore")
     return path.read_text(encoding="utf-8", errors="ignore")
 
@@ -285,62 +550,74 @@ def call_openrouter_vision(
     temperature: float = DEFAULT_TEMPERATURE,
     max_tokens: int = DEFAULT_MAX_TOKENS
 ) -> str:
-    """Call OpenRouter API with vision support."""
+    """Call OpenRouter API with vision support (identical requests, images included, come from the response cache)."""
     
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
         raise ValueError("OPENROUTER_API_KEY not found in environment")
     
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-    )
-    
-    print(f"  Calling OpenRouter Vision API ({model}, temp={temperature})...")
+    def create():
+        client = get_client(
+            base_url=OPENROUTER_BASE_URL,
+            api_key=api_key,
+        )
+        
+        print(f"  Calling OpenRouter Vision API ({model}, temp={temperature})...")
+        
+        with track_request() as req:
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            record_usage(req, response)
+        print(f"  API latency {req['latency_seconds']:.1f}s, {req['connections_opened']} new connection(s), "
+              f"{req['prompt_tokens']} input tokens ({req['cached_prompt_tokens']} cached)")
+        
+        return response.choices[0].message.content.strip()
     
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        max_tokens=max_tokens
+    return cached_completion(
+        create, model=model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+        endpoint=resolve_base_url(OPENROUTER_BASE_URL)
     )
-    
-    return response.choices[0].message.content.strip()
 
 
-def analyze_case_with_vision(case_id: str, dry_run: bool = False) -> dict:
+def analyze_case_with_vision(case_id: str, dry_run: bool = False, max_pixels: int = DEFAULT_MAX_PIXELS,
+                             image_format: str = DEFAULT_IMAGE_FORMAT, image_workers: int = IMAGE_WORKERS,
+                             template: Optional[str] = None) -> dict:
     """
     Analyze a case using both PNG images and text.
     
+    template: PK-WAP template text already loaded by the caller (batch runs); read here if None.
+    
     Returns dict with analysis results and metadata.
     """
     print(f"\n{'='*60}")
     print(f"Vision Analysis: {case_id}")
     print(f"{'='*60}")
     
-    # Load naming mapping
-    naming_map = load_naming_mapping()
-    print(f"  Loaded {len(naming_map)} case-to-name mappings")
-    
-    # Find PNG folder
-    png_folder = find_png_folder(case_id, naming_map)
+    # Look up PNG folder, pages and transcript in the case index
+    case = lookup_case(case_id)
+    png_folder = case["png_folder"]
     if not png_folder:
         return {"status": "error", "message": f"PNG folder not found for {case_id}"}
     print(f"  Found PNG folder: {png_folder.name}")
     
     # Count PNGs
-    png_files = list(png_folder.glob("*.png"))
+    png_files = case["pages"]
     print(f"  Found {len(png_files)} PNG files")
     
     # Find transcript
-    transcript_path = find_transcript(case_id)
+    transcript_path = case["transcript"]
     if not transcript_path:
         return {"status": "error", "message": f"Transcript not found for {case_id}"}
     print(f"  Found transcript: {transcript_path.name}")
     
     # Load template
-    template = load_template()
-    print(f"  Loaded PK-WAP template")
+    if template is None:
+        template = load_template()
+        print(f"  Loaded PK-WAP template")
     
     if dry_run:
         print("\n  [DRY RUN - would send to API]")
@@ -354,7 +631,12 @@ def analyze_case_with_vision(case_id: str, dry_run: bool = False) -> dict:
     
     # Load content
     print(f"  Loading PNG images...")
-    images = load_png_images(png_folder)
+    t0 = time.time()
+    images = load_png_images(png_folder, max_pixels=max_pixels, image_format=image_format,
+                             workers=image_workers, pages=png_files)
+    prep_seconds = time.time() - t0
+    payload_bytes = sum(len(img["image_url"]["url"]) for img in images)
+    print(f"  Prepared {len(images)} images ({payload_bytes/1024/1024:.2f} MB base64) in {prep_seconds:.1f}s")
     
     print(f"  Loading transcript text...")
     transcript = read_file(transcript_path)
@@ -364,8 +646,10 @@ def analyze_case_with_vision(case_id: str, dry_run: bool = False) -> dict:
     
     # Call API
     start_time = time.time()
+    take_last_request()
     memo_content = call_openrouter_vision(messages)
     elapsed = time.time() - start_time
+    req = take_last_request()  # None when the response came from the cache
     
     # Save output
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -381,10 +665,91 @@ def analyze_case_with_vision(case_id: str, dry_run: bool = False) -> dict:
         "output_file": str(output_file),
         "elapsed_seconds": elapsed,
         "memo_length": len(memo_content),
-        "png_count": len(png_files)
+        "png_count": len(png_files),
+        "image_count": len(images),
+        "image_payload_bytes": payload_bytes,
+        "image_prep_seconds": prep_seconds,
+        "cached_response": req is None,
+        "api_latency_seconds": req["latency_seconds"] if req else 0.0,
+        "prompt_tokens": req["prompt_tokens"] if req else 0,
+        "completion_tokens": req["completion_tokens"] if req else 0
     }
 
 
+def read_case_list(path: Path) -> List[str]:
+    """Case IDs from a text file: one per line (or comma-separated), # starts a comment."""
+    cases = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0]
+        cases.extend(c.strip() for c in line.split(",") if c.strip())
+    return cases
+
+
+def run_cases(case_ids: List[str], log_file: Path, concurrency: int = DEFAULT_CONCURRENCY,
+              dry_run: bool = False, **case_kwargs) -> List[dict]:
+    """
+    Analyze several cases with up to `concurrency` of them in flight.
+    
+    The naming map, case index and template are loaded once and shared. Each
+    finished case is appended to the JSON Lines progress log (log_file with a
+    .jsonl suffix); the JSON summary at log_file is written atomically, in input
+    order, once the run ends.
+    """
+    load_case_index()  # build/refresh once, before the workers start
+    template = load_template()
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    progress_path = log_file.with_suffix(".jsonl")
+    results = [None] * len(case_ids)
+    
+    def run_one(case_id):
+        t0 = time.time()
+        try:
+            result = analyze_case_with_vision(case_id, dry_run=dry_run, template=template, **case_kwargs)
+        except Exception as e:
+            print(f"  ✗ Error ({case_id}): {e}")
+            result = {"status": "error", "message": str(e)}
+        result.setdefault("case_id", case_id)
+        result["wall_seconds"] = time.time() - t0
+        return result
+    
+    with open(progress_path, "w", encoding="utf-8") as progress, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(run_one, case_id): i for i, case_id in enumerate(case_ids)}
+        for finished, future in enumerate(as_completed(futures), 1):
+            # Consumed on the main thread, so log appends never interleave
+            result = future.result()
+            results[futures[future]] = result
+            progress.write(json.dumps(result) + "\n")
+            progress.flush()
+            os.fsync(progress.fileno())
+            print(f"  ({finished}/{len(case_ids)} finished: {result['case_id']} {result['status']})")
+    
+    tmp = log_file.with_name(log_file.name + ".tmp")
+    tmp.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    os.replace(tmp, log_file)
+    return results
+
+
+def print_cases_summary(results: List[dict], log_file: Path, wall_seconds: float):
+    print(f"\n{'='*60}")
+    print("VISION BATCH COMPLETE")
+    print(f"{'='*60}")
+    ok = [r for r in results if r["status"] in ("success", "dry_run")]
+    print(f"Cases: {len(results)}   OK: {len(ok)}   Failed: {len(results) - len(ok)}")
+    print(f"\n  {'case':<14}{'status':<10}{'latency s':>10}{'images':>8}{'payload MB':>12}")
+    for r in results:
+        print(f"  {r['case_id']:<14}{r['status']:<10}{r.get('api_latency_seconds', 0.0):>10.1f}"
+              f"{r.get('image_count', 0):>8}{r.get('image_payload_bytes', 0)/1024/1024:>12.2f}")
+    payload = sum(r.get("image_payload_bytes", 0) for r in results)
+    print(f"\nImage payload: {payload/1024/1024:.2f} MB base64 across {sum(r.get('image_count', 0) for r in results)} images")
+    api = llm_client.stats
+    if api["requests"]:
+        print(f"API requests: {api['requests']}, mean latency {api['latency_seconds'] / api['requests']:.1f}s, "
+              f"{api['connections']} new connection(s)")
+    print(f"Wall time: {wall_seconds:.1f}s")
+    print(f"\nLog saved to: {log_file}")
+
+
 def compare_memos(case_id: str):
     """Compare text-only vs vision memo for a case."""
     text_memo_path = CHAPTER_REPO / f"Analysis/anchor_memos_conservative/{case_id}_PK-WAP.md"
@@ -430,6 +795,28 @@ def main():
         type=str,
         help="Case ID to analyze (e.g., P93-G1-S4)"
     )
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        metavar="CASE",
+        help="Analyze several cases concurrently (batch mode)"
+    )
+    parser.add_argument(
+        "--cases-file",
+        type=Path,
+        help="Text file of case IDs for batch mode (one per line, # comments)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Cases analyzed at once in batch mode (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--log",
+        type=Path,
+        help="Batch results log (default: OUTPUT_DIR/vision_batch_log.json; progress in .jsonl next to it)"
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -445,27 +832,92 @@ def main():
         action="store_true",
         help="List cases with both PNG and transcript available"
     )
+    parser.add_argument(
+        "--docx-engine",
+        choices=sorted(DOCX_ENGINES),
+        help="How to extract .docx transcripts: python-docx (default) or xml (no python-docx needed; parity checked by validate_docx_text.py)"
+    )
+    parser.add_argument(
+        "--cache-mode",
+        choices=CACHE_MODES,
+        help="API response cache: auto (read at temperature 0, else off; default), read (reuse + store), write (refresh), off"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help=f"Per-request read timeout in seconds (default: {DEFAULT_TIMEOUT:g})"
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        help=f"Connection timeout in seconds (default: {DEFAULT_CONNECT_TIMEOUT:g})"
+    )
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help=f"Rebuild the case index ({CASE_INDEX_PATH}) even if the directories look unchanged"
+    )
+    parser.add_argument(
+        "--max-pixels",
+        type=int,
+        default=DEFAULT_MAX_PIXELS,
+        help=f"Downscale each page to at most this many pixels before upload; 0 = full size (default: {DEFAULT_MAX_PIXELS})"
+    )
+    parser.add_argument(
+        "--image-format",
+        choices=["png", "jpeg"],
+        default=DEFAULT_IMAGE_FORMAT,
+        help=f"Re-encode pages as png (lossless) or jpeg (quality {JPEG_QUALITY}, smaller) (default: {DEFAULT_IMAGE_FORMAT})"
+    )
+    parser.add_argument(
+        "--image-workers",
+        type=int,
+        default=IMAGE_WORKERS,
+        help=f"Threads used to prepare page images (default: {IMAGE_WORKERS})"
+    )
     
     args = parser.parse_args()
+    set_docx_engine(args.docx_engine)
+    set_cache_mode(args.cache_mode)
+    set_timeouts(args.timeout, args.connect_timeout)
+    
+    if args.rebuild_index:
+        cases = load_case_index(rebuild=True)
+        print(f"Indexed {len(cases)} cases -> {CASE_INDEX_PATH}")
     
     if args.list_available:
         print("Cases with both PNG folders and transcripts:\n")
-        naming_map = load_naming_mapping()
-        for code in sorted(naming_map.keys()):
-            png_folder = find_png_folder(code, naming_map)
-            transcript = find_transcript(code)
-            if png_folder and transcript:
-                png_count = len(list(png_folder.glob("*.png")))
-                print(f"  {code}: {png_count} PNGs, {transcript.name}")
+        cases = load_case_index()
+        for code in sorted(cases.keys()):
+            entry = cases[code]
+            if entry["png_folder"] and entry["transcript"]:
+                print(f"  {code}: {len(entry['pages'])} PNGs, {Path(entry['transcript']).name}")
         return
     
-    if args.case:
-        result = analyze_case_with_vision(args.case, dry_run=args.dry_run)
+    case_ids = list(args.cases or [])
+    if args.cases_file:
+        case_ids += read_case_list(args.cases_file)
+    if case_ids:
+        case_ids = list(dict.fromkeys(case_ids))  # drop repeats, keep order
+        log_file = args.log or OUTPUT_DIR / "vision_batch_log.json"
+        print(f"Batch: {len(case_ids)} case(s), concurrency {args.concurrency}")
+        start = time.time()
+        results = run_cases(case_ids, log_file, concurrency=args.concurrency, dry_run=args.dry_run,
+                            max_pixels=args.max_pixels, image_format=args.image_format,
+                            image_workers=args.image_workers)
+        print_cases_summary(results, log_file, time.time() - start)
+        if args.compare:
+            for r in results:
+                if r["status"] == "success":
+                    compare_memos(r["case_id"])
+    elif args.case:
+        result = analyze_case_with_vision(args.case, dry_run=args.dry_run, max_pixels=args.max_pixels,
+                                          image_format=args.image_format, image_workers=args.image_workers)
         print(f"\nResult: {json.dumps(result, indent=2)}")
         
         if args.compare and result.get("status") == "success":
             compare_memos(args.case)
-    else:
+    elif not args.rebuild_index:
         parser.print_help()
 
 
@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
-import os, re, csv, math, argparse, glob
+import os, re, csv, math, argparse, glob, statistics
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # optional: class totals fall back to a plain loop over the arrays
+    np = None
 
 # ---------- Configurable phrases to hard-ignore (RB4) ----------
 PREAMBLE_PHRASES = [
@@ -43,44 +51,113 @@ def count_words_no_tags(text: str) -> int:
     rest = split_my_answer(rest)
     return len(WORD_RE.findall(rest))
 
-def recount_file(annot_path: str, uncertain_weight: float = 0.5):
-    """Recompute totals from a single __annotated.txt file.
-       - RB4 preamble ignored regardless of tag
-       - [AI?]/[STUDENT?] weighted by uncertain_weight
-       - unknown does not enter the %Student denominator
-       Returns dict with filename, student_words, ai_words, unknown_words, total, pct_student
+# ---------- Parse-once engine ----------
+# Line labels in the parsed arrays; untagged and [UNK] lines are both "unknown"
+LABEL_CODES = {"STUDENT": 0, "AI": 1, "UNK": 2}
+UNKNOWN = 2
+# Word totals per class, in this order: weights apply as dot products over them
+CLASSES = ("student", "student_uncertain", "ai", "ai_uncertain", "unknown")
+
+# lower() + str.find agrees with PREAMBLE_RE's IGNORECASE matching except for these
+# characters, which case-fold onto ASCII letters (İ ı ſ K); texts containing one use the regex
+_FOLD_SPECIAL = ("\u0130", "\u0131", "\u017f", "\u212a")
+_PREAMBLE_LOWER = [p.lower() for p in PREAMBLE_PHRASES]
+
+def _preamble_positions(text: str):
+    """Start offsets of preamble phrases in text (every line containing one has at least one)."""
+    if any(c in text for c in _FOLD_SPECIAL):
+        return [m.start() for m in PREAMBLE_RE.finditer(text)]
+    lowered = text.lower()
+    positions = []
+    for phrase in _PREAMBLE_LOWER:
+        pos = lowered.find(phrase)
+        while pos >= 0:
+            positions.append(pos)
+            pos = lowered.find(phrase, pos + 1)
+    return positions
+
+def _preamble_line_numbers(text: str, lines) -> set:
+    """Indexes of lines containing a preamble phrase (one pass over the whole file)."""
+    matches = _preamble_positions(text)
+    if not matches:
+        return set()
+    starts = list(accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+    return {bisect_right(starts, pos) - 1 for pos in matches}
+
+def class_totals(labels, uncertain, words):
+    """Word totals per CLASSES entry from the per-line arrays."""
+    if np is not None and len(words):
+        codes = np.asarray(labels, dtype=np.intp) * 2 + np.asarray(uncertain, dtype=np.intp)
+        codes[codes >= 2 * UNKNOWN] = 2 * UNKNOWN  # unknown is never weighted
+        sums = np.bincount(codes, weights=np.asarray(words, dtype=np.float64), minlength=2 * UNKNOWN + 1)
+        return tuple(int(v) for v in sums)
+    sums = [0] * len(CLASSES)
+    for label, unc, n in zip(labels, uncertain, words):
+        sums[min(label * 2 + unc, 2 * UNKNOWN)] += n
+    return tuple(sums)
+
+def parse_annot_file(annot_path: str) -> dict:
+    """Parse a single __annotated.txt file once, with the same rules as the line-by-line recount.
+       Returns dict with filename and parallel arrays (one entry per countable line):
+       labels (LABEL_CODES), uncertain (1 for [AI?]/[STUDENT?]/[UNK?]) and words,
+       plus classes = word totals per CLASSES entry, ready for any uncertain weight.
     """
-    st = ai = unk = 0.0
     with open(annot_path, encoding="utf-8") as f:
-        for raw in f:
-            line = raw.rstrip("\n")
-            if not line:
-                continue
-            if is_preamble_line(line):
-                # hard ignore the canned template/preamble
-                continue
-            label, tag_uncertain, rest = strip_leading_tag(line)
-            n = count_words_no_tags(rest)
-            if n == 0:
-                continue
-            if label == "STUDENT":
-                w = 1.0 if not tag_uncertain else uncertain_weight
-                st += w * n
-            elif label == "AI":
-                w = 1.0 if not tag_uncertain else uncertain_weight
-                ai += w * n
-            else:
-                unk += n
+        text = f.read()
+    lines = text.split("\n")
+    preamble = _preamble_line_numbers(text, lines)
 
+    labels, uncertain, words = array("b"), array("b"), array("l")
+    for i, line in enumerate(lines):
+        if not line or i in preamble:
+            continue
+        m = TAG_RE.match(line)
+        if m:
+            label, unc, rest = LABEL_CODES[m.group(1).upper()], 1 if m.group(2) else 0, line[m.end():]
+            # count_words_no_tags() strips a second leading tag from the remainder
+            m = TAG_RE.match(rest)
+            if m:
+                rest = rest[m.end():]
+        else:
+            label, unc, rest = UNKNOWN, 0, line
+        m = MYANSWER_RE.match(rest)
+        if m:
+            rest = rest[m.end():]
+        n = len(WORD_RE.findall(rest))
+        if n == 0:
+            continue
+        labels.append(label)
+        uncertain.append(unc)
+        words.append(n)
+
+    base = os.path.basename(annot_path)
+    return {
+        # turn Pxx-...__annotated.txt -> Pxx-....
+        "filename": base.replace("__annotated.txt", ""),
+        "labels": labels,
+        "uncertain": uncertain,
+        "words": words,
+        "classes": class_totals(labels, uncertain, words),
+    }
+
+def class_weights(uncertain_weight: float):
+    """Rows of weights over CLASSES giving the (student, ai, unknown) totals."""
+    w = uncertain_weight
+    return ((1.0, w, 0.0, 0.0, 0.0),
+            (0.0, 0.0, 1.0, w, 0.0),
+            (0.0, 0.0, 0.0, 0.0, 1.0))
+
+def weighted_totals(classes, uncertain_weight: float = 0.5):
+    """(student, ai, unknown) word totals for one file's class totals at the given weight."""
+    return tuple(sum(wt * n for wt, n in zip(row, classes)) for row in class_weights(uncertain_weight))
+
+def totals_row(fname: str, st: float, ai: float, unk: float) -> dict:
+    """Summary row (same columns as summary_fixed.csv) from weighted word totals."""
     st_i = int(round(st))
     ai_i = int(round(ai))
     unk_i = int(round(unk))
     den = st_i + ai_i
     pct_st = round(100.0 * st_i / den, 1) if den > 0 else ""
-
-    base = os.path.basename(annot_path)
-    # turn Pxx-...__annotated.txt -> Pxx-....
-    fname = base.replace("__annotated.txt", "")
     return {
         "filename": fname,
         "student_words": st_i,
@@ -92,11 +169,122 @@ def recount_file(annot_path: str, uncertain_weight: float = 0.5):
         "note": "" if den > 0 else "no countable AI/Student lines",
     }
 
+def recount_file(annot_path: str, uncertain_weight: float = 0.5):
+    """Recompute totals from a single __annotated.txt file.
+       - RB4 preamble ignored regardless of tag
+       - [AI?]/[STUDENT?] weighted by uncertain_weight
+       - unknown does not enter the %Student denominator
+       Returns dict with filename, student_words, ai_words, unknown_words, total, pct_student
+    """
+    parsed = parse_annot_file(annot_path)
+    return totals_row(parsed["filename"], *weighted_totals(parsed["classes"], uncertain_weight))
+
+# ---------- Uncertain-weight sweep ----------
+SUMMARY_FIELDS = ["filename","student_words","ai_words","total","pct_student","unknown_words","status","note"]
+SWEEP_FIELDS = ["filename","uncertain_weight","student_words","ai_words","total","pct_student","unknown_words","status","note"]
+CORPUS_FIELDS = ["uncertain_weight","files_ok","files_needs_review","student_words","ai_words","unknown_words",
+                 "pooled_pct_student","mean_pct_student","median_pct_student","sd_pct_student",
+                 "min_pct_student","max_pct_student"]
+
+def parse_sweep(spec: str):
+    """'START:STOP:STEP' -> weights from START to STOP inclusive (e.g. 0:1:0.05 -> 21 weights)."""
+    try:
+        start, stop, step = (float(x) for x in spec.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START:STOP:STEP, got {spec!r}")
+    if step <= 0 or stop < start or start < 0:
+        raise argparse.ArgumentTypeError(f"need 0 <= START <= STOP and STEP > 0, got {spec!r}")
+    n = int(math.floor((stop - start) / step + 1e-9)) + 1
+    # round away float drift so 0.35 is the same weight as --uncertain-weight 0.35
+    return [round(start + i * step, 10) for i in range(n)]
+
+def sweep_totals(classes, weights):
+    """Weighted (student, ai, unknown) totals for every file at every weight: [file][weight] -> tuple.
+       classes holds one class-totals tuple per file (parse_annot_file()["classes"])."""
+    if np is None or not classes:
+        return [[weighted_totals(c, w) for w in weights] for c in classes]
+    c = np.asarray(classes, dtype=np.float64)
+    w = np.asarray(weights, dtype=np.float64)
+    st = (c[:, [0]] + c[:, [1]] * w).tolist()
+    ai = (c[:, [2]] + c[:, [3]] * w).tolist()
+    return [[(s, a, unk) for s, a in zip(st_row, ai_row)]
+            for st_row, ai_row, unk in zip(st, ai, c[:, 4].tolist())]
+
+def corpus_stats(weight: float, rows) -> dict:
+    """Corpus-level %Student statistics for one weight from its per-file rows."""
+    ok = [r for r in rows if r["status"] == "ok"]
+    pcts = [r["pct_student"] for r in ok]
+    st = sum(r["student_words"] for r in ok)
+    ai = sum(r["ai_words"] for r in ok)
+    return {
+        "uncertain_weight": weight,
+        "files_ok": len(ok),
+        "files_needs_review": sum(1 for r in rows if r["status"] == "needs_review"),
+        "student_words": st,
+        "ai_words": ai,
+        "unknown_words": sum(r["unknown_words"] for r in rows if r["status"] != "error"),
+        "pooled_pct_student": round(100.0 * st / (st + ai), 1) if st + ai else "",
+        "mean_pct_student": round(statistics.mean(pcts), 2) if pcts else "",
+        "median_pct_student": round(statistics.median(pcts), 2) if pcts else "",
+        "sd_pct_student": round(statistics.stdev(pcts), 2) if len(pcts) > 1 else "",
+        "min_pct_student": min(pcts) if pcts else "",
+        "max_pct_student": max(pcts) if pcts else "",
+    }
+
+def run_sweep(files, weights, outdir: str, save: str):
+    """Parse every file once, recount at every weight; write the long CSV and the corpus CSV."""
+    parsed, failed = [], {}
+    for i, p in enumerate(files):
+        try:
+            parsed.append((i, parse_annot_file(p)))
+        except Exception as e:
+            base = os.path.basename(p).replace("__annotated.txt", "")
+            failed[i] = {**dict.fromkeys(SUMMARY_FIELDS, ""), "filename": base,
+                         "status": "error", "note": f"{type(e).__name__}: {e}"}
+            print(f"  {base:<30} → error: {e}")
+    grid = sweep_totals([f["classes"] for _i, f in parsed], weights)
+
+    # rows in file order for each weight, as in summary_fixed.csv
+    per_weight = [[None] * len(files) for _ in weights]
+    for (i, f), totals in zip(parsed, grid):
+        for rows, t in zip(per_weight, totals):
+            rows[i] = totals_row(f["filename"], *t)
+    for i, row in failed.items():
+        for rows in per_weight:
+            rows[i] = row
+
+    long_csv = os.path.join(outdir, save)
+    with open(long_csv, "w", newline="", encoding="utf-8") as g:
+        w = csv.DictWriter(g, fieldnames=SWEEP_FIELDS)
+        w.writeheader()
+        for weight, rows in zip(weights, per_weight):
+            for r in rows:
+                w.writerow({**r, "uncertain_weight": weight})
+
+    corpus = [corpus_stats(weight, rows) for weight, rows in zip(weights, per_weight)]
+    corpus_csv = os.path.join(outdir, os.path.splitext(save)[0] + "_corpus.csv")
+    with open(corpus_csv, "w", newline="", encoding="utf-8") as g:
+        w = csv.DictWriter(g, fieldnames=CORPUS_FIELDS)
+        w.writeheader()
+        for r in corpus: w.writerow(r)
+
+    print(f"\n{'weight':>7} {'files':>6} {'pooled %St':>11} {'mean':>7} {'median':>7} {'sd':>6} {'min':>6} {'max':>6}")
+    for r in corpus:
+        print(f"{r['uncertain_weight']:>7g} {r['files_ok']:>6} {str(r['pooled_pct_student']):>11} "
+              f"{str(r['mean_pct_student']):>7} {str(r['median_pct_student']):>7} {str(r['sd_pct_student']):>6} "
+              f"{str(r['min_pct_student']):>6} {str(r['max_pct_student']):>6}")
+    return long_csv, corpus_csv
+
 def main():
     ap = argparse.ArgumentParser(description="Recount totals from __annotated.txt files with RB4 + uncertain weighting.")
     ap.add_argument("--outdir", required=True, help="Existing run folder that contains annotated/ and summary.csv")
     ap.add_argument("--uncertain-weight", type=float, default=0.5, help="Weight for [AI?]/[STUDENT?] lines (0 to drop).")
     ap.add_argument("--save", default="summary_fixed.csv", help="Output CSV filename (inside --outdir).")
+    ap.add_argument("--sweep", type=parse_sweep, metavar="START:STOP:STEP",
+                    help="Recount at every uncertain weight in the range (e.g. 0:1:0.05), parsing each file once; "
+                         "replaces --uncertain-weight.")
+    ap.add_argument("--sweep-save", default="uncertain_sweep.csv",
+                    help="Long-format sweep CSV (inside --outdir); corpus statistics go to <name>_corpus.csv.")
     args = ap.parse_args()
 
     annot_dir = os.path.join(args.outdir, "annotated")
@@ -107,6 +295,15 @@ def main():
     if not files:
         raise SystemExit(f"[abort] No __annotated.txt files in {annot_dir}")
 
+    if args.sweep:
+        print(f"Found {len(files)} annotated files. Sweeping uncertain_weight over {len(args.sweep)} values "
+              f"({args.sweep[0]:g} … {args.sweep[-1]:g}) …")
+        long_csv, corpus_csv = run_sweep(files, args.sweep, args.outdir, args.sweep_save)
+        print("\nDone.")
+        print(f"  Per file × weight: {long_csv}")
+        print(f"  Corpus per weight: {corpus_csv}")
+        return
+
     print(f"Found {len(files)} annotated files. Recounting with uncertain_weight={args.uncertain_weight} …")
     rows = []
     for i, p in enumerate(files, 1):
@@ -125,7 +322,7 @@ def main():
 
     out_csv = os.path.join(args.outdir, args.save)
     with open(out_csv, "w", newline="", encoding="utf-8") as g:
-        w = csv.DictWriter(g, fieldnames=["filename","student_words","ai_words","total","pct_student","unknown_words","status","note"])
+        w = csv.DictWriter(g, fieldnames=SUMMARY_FIELDS)
         w.writeheader()
         for r in rows: w.writerow(r)
 
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+stub_chat_server.py — local stand-in for the chat-completions endpoint.
+
+Answers POST .../chat/completions with an OpenAI-shaped response after a fixed
+delay, so batch runs (pkwap_analyzer.py --concurrency, rate limiting, logging)
+can be exercised without an API key or network. Records how many requests were
+in flight at once, and reports cached prompt tokens the way a provider with
+prefix caching would (shared prefix with the previous prompt, >= 1024 tokens,
+in 128-token steps, at ~4 characters per token). Each answer ends with a valid
+```json summary block (see memo_schema.py), unless the prompt contains
+NO_SUMMARY_MARKER, which exercises the analyzer's summary-repair call.
+
+Usage:
+  python3 stub_chat_server.py --port 8765 --delay 2
+  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub \\
+      python3 pkwap_analyzer.py --batch transcripts/ --output /tmp/memos --concurrency 4
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+STUB_SUMMARY = {
+    "highest_level": {"level": 3, "name": "Image Having"},
+    "layers": [{"layer": "Image Having", "level": 3, "evidence": ["stub"]}],
+    "recursion_count": 0,
+    "quotes": [{"speaker": "student", "text": "hi", "page": 1}],
+    "word_counts": {"rows": [{"page": 1, "student_words": 1, "ai_words": 1, "pct_student": 50.0}],
+                    "total": {"student_words": 1, "ai_words": 1, "pct_student": 50.0}},
+    "agentic_moves": [],
+    "notable_features": [],
+}
+NO_SUMMARY_MARKER = "[stub:no-summary]"
+
+
+class StubChatServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, delay=0.5, fail_every=0):
+        super().__init__(addr, StubChatHandler)
+        self.delay = delay
+        self.fail_every = fail_every  # every Nth request returns HTTP 500 (0 = never)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.start_times = []
+        self.last_prompt = ""
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_POST(self):
+        srv = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with srv.lock:
+            srv.requests += 1
+            n = srv.requests
+            srv.in_flight += 1
+            srv.peak_in_flight = max(srv.peak_in_flight, srv.in_flight)
+            srv.start_times.append(time.monotonic())
+        try:
+            time.sleep(srv.delay)
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._reply(404, {"error": {"message": f"no route {self.path}"}})
+            if srv.fail_every and n % srv.fail_every == 0:
+                return self._reply(500, {"error": {"message": "stub failure", "type": "server_error"}})
+            prompt = "".join(m.get("content") if isinstance(m.get("content"), str) else ""
+                             for m in body.get("messages", []))
+            prompt_chars = len(prompt)
+            with srv.lock:
+                shared = os.path.commonprefix([prompt, srv.last_prompt])
+                srv.last_prompt = prompt
+            cached_tokens = len(shared) // 4 // 128 * 128
+            if cached_tokens < 1024:
+                cached_tokens = 0
+            content = f"# Stub memo {n}\n\nmodel={body.get('model')} prompt_chars={prompt_chars}\n"
+            if NO_SUMMARY_MARKER not in prompt:
+                content += f"\n```json\n{json.dumps(STUB_SUMMARY)}\n```\n"
+            self._reply(200, {
+                "id": f"chatcmpl-stub-{n}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_chars // 4,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": prompt_chars // 4 + len(content) // 4,
+                },
+            })
+        finally:
+            with srv.lock:
+                srv.in_flight -= 1
+
+    def _reply(self, code, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_in_thread(port=0, delay=0.5, fail_every=0) -> StubChatServer:
+    """Start a server on 127.0.0.1 (port 0 = any free port) in a daemon thread."""
+    srv = StubChatServer(("127.0.0.1", port), delay=delay, fail_every=fail_every)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve a fake chat-completions endpoint for batch testing.")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--delay", type=float, default=0.5, help="Seconds before each response (default 0.5)")
+    ap.add_argument("--fail-every", type=int, default=0, help="Return HTTP 500 on every Nth request")
+    args = ap.parse_args()
+    srv = StubChatServer(("127.0.0.1", args.port), delay=args.delay, fail_every=args.fail_every)
+    print(f"Stub chat server on {srv.base_url} (delay {args.delay}s). Ctrl-C to stop.")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"\n{srv.requests} request(s), peak {srv.peak_in_flight} in flight")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Check pkwap_analyzer.py batch concurrency against the local stub endpoint.
+
+Starts stub_chat_server.py in-process, writes synthetic transcripts and a
+template to a temp folder, and runs batch_process() with --concurrency N.
+The last transcript is too long for the (small) context window, so it is
+analysed in page-aligned chunks plus a reduce call, and the first one gets
+a memo without a JSON summary, so it needs the summary-repair call. Verifies
+every memo was written with a valid JSON summary (sidecar and corpus line),
+the JSON log is complete and in input order, the long transcript was chunked,
+the first memo's summary was repaired, no more than N requests were ever in
+flight, every request start (chunk, reduce and repair calls included)
+respected --rpm, pooled connections were reused (at most N opened),
+and the run beat the serial time. For the --rpm check, use a --delay below
+60/rpm so that requests made back to back would break the limit.
+
+Usage:
+  python3 validate_async_batch.py
+  python3 validate_async_batch.py --files 12 --concurrency 4 --delay 0.1 --rpm 240
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import stub_chat_server
+
+CONTEXT_TOKENS = 8000  # small window so the long transcript needs chunking
+MAX_TOKENS = 1000
+LONG_PAGES = 3  # form-feed pages of ~4000 tokens each: one chunk per page
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Exercise pkwap_analyzer batch concurrency against a stub server.")
+    ap.add_argument("--files", type=int, default=8, help="Transcripts (at least 2): the first needs a summary repair, the last is chunked")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--delay", type=float, default=0.5, help="Stub response delay in seconds")
+    ap.add_argument("--rpm", type=float, default=0, help="Rate limit to test (0 = unlimited)")
+    ap.add_argument("--burst", type=int, default=1)
+    args = ap.parse_args()
+    if args.files < 2:
+        ap.error("--files must be at least 2")
+
+    srv = stub_chat_server.start_in_thread(delay=args.delay)
+    os.environ["OPENAI_BASE_URL"] = srv.base_url
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["LLM_CACHE_MODE"] = "off"  # every transcript must reach the server
+    import pkwap_analyzer as pa  # after the env is set
+    pa.llm_client.get_client().chat.completions  # build the client (and its lazy resources) before timing starts
+
+    print("=" * 90)
+    print(f"ASYNC BATCH CHECK  files={args.files} concurrency={args.concurrency} "
+          f"delay={args.delay}s rpm={args.rpm:g}  ({srv.base_url})")
+    print("=" * 90)
+
+    problems = []
+    with tempfile.TemporaryDirectory(prefix="pkwap_async_") as tmp:
+        tmp = Path(tmp)
+        tdir, out = tmp / "transcripts", tmp / "memos"
+        tdir.mkdir()
+        template = tmp / "template.md"
+        template.write_text("# Template\n\n## 1. Word Count\n", encoding="utf-8")
+        ids = [f"P{k:02d}-G1-S1" for k in range(args.files)]
+        for cid in ids[:-1]:
+            (tdir / f"{cid}.txt").write_text(f"AI: hello {cid}\nStudent: hi\n", encoding="utf-8")
+        (tdir / f"{ids[0]}.txt").write_text(f"AI: hello {stub_chat_server.NO_SUMMARY_MARKER}\nStudent: hi\n",
+                                            encoding="utf-8")
+        long_page = "AI: " + "words " * 2600 + "\nStudent: " + "answer " * 600 + "\n"
+        (tdir / f"{ids[-1]}.txt").write_text("\f".join([long_page] * LONG_PAGES), encoding="utf-8")
+
+        t0 = time.monotonic()
+        pa.batch_process(tdir, template, out, "stub-model", 0.0, MAX_TOKENS,
+                         concurrency=args.concurrency, rpm=args.rpm, burst=args.burst,
+                         context_tokens=CONTEXT_TOKENS)
+        wall = time.monotonic() - t0
+
+        log = json.loads((out / "pkwap_batch_log.json").read_text())
+        if [r["transcript_id"] for r in log] != ids:
+            problems.append("log is incomplete or out of input order")
+        if log and log[-1].get("chunks") != LONG_PAGES:
+            problems.append(f"long transcript used {log[-1].get('chunks')} chunk(s), expected {LONG_PAGES}")
+        if log and not (log[0].get("summary_repaired") and log[0].get("api_calls") == 2):
+            problems.append("first transcript's missing summary was not repaired with one extra call")
+        if sum(r.get("api_calls", 0) for r in log) != srv.requests:
+            problems.append(f"log counts {sum(r.get('api_calls', 0) for r in log)} API calls, "
+                            f"server saw {srv.requests}")
+        failed = [r["transcript_id"] for r in log if r["status"] != "success"]
+        if failed:
+            problems.append(f"failed transcripts: {failed}")
+        missing = [cid for cid in ids if not (out / f"{cid}_PK-WAP.md").exists()
+                   or not (out / f"{cid}_PK-WAP.json").exists()]
+        if missing:
+            problems.append(f"memos not written: {missing}")
+        unstructured = [r["transcript_id"] for r in log if not r.get("structured")]
+        if unstructured:
+            problems.append(f"no valid JSON summary: {unstructured}")
+        corpus = (out / "pkwap_memos.jsonl").read_text().splitlines() if (out / "pkwap_memos.jsonl").exists() else []
+        if len(corpus) != args.files:
+            problems.append(f"corpus JSONL has {len(corpus)} line(s) for {args.files} memos")
+        if list(out.glob("*.tmp")):
+            problems.append("temporary log file left behind")
+
+    conns = pa.llm_client.stats["connections"]
+    if conns > args.concurrency:
+        problems.append(f"{conns} connections opened for {args.concurrency} concurrent slots (no keep-alive reuse)")
+    if srv.peak_in_flight > args.concurrency:
+        problems.append(f"peak in flight {srv.peak_in_flight} > concurrency {args.concurrency}")
+    if args.rpm > 0:
+        starts = sorted(srv.start_times)
+        rate = args.rpm / 60.0
+        # token bucket: any n consecutive starts span at least (n - burst) / rate seconds
+        worst = max((j - i + 1 - args.burst - (starts[j] - starts[i]) * rate
+                     for i in range(len(starts)) for j in range(i, len(starts))), default=0)
+        if worst > 0.02 * rate:  # 20 ms of timing jitter
+            problems.append(f"request starts exceeded --rpm ({worst:.1f} request(s) over the bucket)")
+    serial = srv.requests * args.delay
+    if args.concurrency > 1 and args.rpm == 0 and wall > 0.75 * serial:
+        problems.append(f"wall time {wall:.2f}s is not faster than serial {serial:.2f}s")
+
+    print(f"\nRequests: {srv.requests}   Peak in flight: {srv.peak_in_flight}   Connections opened: {conns}")
+    print(f"Wall time: {wall:.2f}s   (serial would be ≥ {serial:.2f}s)")
+    for p in problems:
+        print(f"  FAIL  {p}")
+    print("OK" if not problems else f"{len(problems)} problem(s)")
+    srv.shutdown()
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Check the zip + iterparse .docx extractor against python-docx.
+
+First builds a small fixture .docx covering the markup the xml engine has to
+handle like Paragraph.text does: several w:t per run, tabs (w:tab, w:ptab),
+line/page/column breaks, w:cr, non-breaking hyphens, hyperlinks, runs nested
+in w:ins/w:smartTag/w:fldSimple (not paragraph text), body-level tables and
+content controls (not Document.paragraphs), and preserved spaces. Then, for
+every .docx in --input, compares docx_cache.parse_docx_xml() with
+docx_cache.parse_docx() (python-docx), bypassing the on-disk cache, and reports
+mismatching files plus load times for both engines. Exits 1 on any mismatch,
+fixture included, so --docx-engine xml is only a drop-in while this passes.
+
+Usage:
+  python3 validate_docx_text.py
+  python3 validate_docx_text.py --input "Data Formatted to Analyze"
+"""
+
+import argparse
+import difflib
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+import docx_cache
+
+
+FIXTURE_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml"
+ ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+FIXTURE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Target="word/document.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>
+</Relationships>"""
+
+FIXTURE_DOC_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId9" Target="https://example.org/" TargetMode="External"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"/>
+</Relationships>"""
+
+FIXTURE_BODY = """
+<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>
+  <w:r><w:rPr><w:b/></w:rPr><w:t>Student:</w:t></w:r><w:r><w:tab/><w:t xml:space="preserve"> two  spaces </w:t></w:r></w:p>
+<w:p><w:r><w:t>split</w:t><w:t>-t</w:t><w:noBreakHyphen/><w:t>run</w:t><w:ptab w:relativeTo="margin" w:alignment="right" w:leader="none"/><w:t>end</w:t></w:r></w:p>
+<w:p><w:r><w:t>line</w:t><w:br/><w:t>wrap</w:t><w:br w:type="textWrapping"/><w:t>cr</w:t><w:cr/><w:t>page</w:t><w:br w:type="page"/><w:t>column</w:t><w:br w:type="column"/></w:r></w:p>
+<w:p><w:r><w:t xml:space="preserve">see </w:t></w:r><w:hyperlink r:id="rId9"><w:r><w:t>the</w:t></w:r><w:r><w:tab/><w:t>link</w:t></w:r></w:hyperlink><w:r><w:t>.</w:t></w:r></w:p>
+<w:p><w:r><w:t>kept</w:t></w:r><w:ins w:id="1" w:author="a" w:date="2024-01-01T00:00:00Z"><w:r><w:t>inserted</w:t></w:r></w:ins><w:smartTag w:uri="u" w:element="e"><w:r><w:t>tagged</w:t></w:r></w:smartTag><w:fldSimple w:instr="PAGE"><w:r><w:t>1</w:t></w:r></w:fldSimple><w:hyperlink w:anchor="x"><w:smartTag w:uri="u" w:element="e"><w:r><w:t>deep</w:t></w:r></w:smartTag></w:hyperlink></w:p>
+<w:p/>
+<w:p><w:r><w:t/></w:r><w:r/></w:p>
+<w:tbl><w:tr><w:tc><w:p><w:r><w:t>cell text</w:t></w:r></w:p><w:tbl><w:tr><w:tc><w:p><w:r><w:t>nested cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl></w:tc></w:tr></w:tbl>
+<w:sdt><w:sdtContent><w:p><w:r><w:t>content control</w:t></w:r></w:p></w:sdtContent></w:sdt>
+<w:p><w:r><w:t>AI:</w:t></w:r><w:r><w:t xml:space="preserve">	tab char and unicode – é</w:t></w:r></w:p>
+<w:sectPr/>"""
+
+
+def build_fixture(path: Path) -> Path:
+    """Write the fixture .docx (see module docstring) to path."""
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+                ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                f'<w:body>{FIXTURE_BODY}</w:body></w:document>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", FIXTURE_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", FIXTURE_RELS)
+        zf.writestr("word/_rels/document.xml.rels", FIXTURE_DOC_RELS)
+        zf.writestr("word/document.xml", document)
+    return path
+
+
+def compare(path: Path, show: int, label: Optional[str] = None) -> Tuple[bool, float, float]:
+    """Print ok/MISMATCH for one file; returns (match, python-docx seconds, xml seconds)."""
+    t0 = time.perf_counter()
+    ref = docx_cache.parse_docx(path)
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got = docx_cache.parse_docx_xml(path)
+    t_xml = time.perf_counter() - t0
+
+    if ref == got:
+        print(f"  ok        {label or path.name}")
+        return True, t_ref, t_xml
+    print(f"  MISMATCH  {label or path.name}")
+    diff = difflib.unified_diff(ref.split("\n"), got.split("\n"), "python-docx", "xml", lineterm="", n=0)
+    for line in list(diff)[2:2 + show]:
+        print(f"      {line[:100]!r}")
+    return False, t_ref, t_xml
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare xml and python-docx .docx text extraction.")
+    ap.add_argument("--input", help="Folder containing .docx transcripts (default: fixture only)")
+    ap.add_argument("--show", type=int, default=5, help="Diff lines to print per mismatching file (default 5)")
+    args = ap.parse_args()
+
+    files = sorted(Path(args.input).expanduser().glob("*.docx")) if args.input else []
+    if args.input and not files:
+        raise SystemExit(f"[abort] no .docx files in {args.input}")
+
+    print("=" * 90)
+    print("DOCX EXTRACTION: xml engine vs python-docx")
+    print("=" * 90)
+
+    t0 = time.perf_counter()
+    try:
+        import docx  # noqa: F401  (timed separately: the import alone is part of the cost)
+    except ImportError:
+        raise SystemExit("[abort] python-docx is not installed; nothing to compare against")
+    t_import = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_ok = compare(build_fixture(Path(tmp) / "fixture.docx"), args.show, "(fixture)")[0]
+
+    t_ref = t_xml = 0.0
+    mismatches = 0
+    for path in files:
+        ok, dt_ref, dt_xml = compare(path, args.show)
+        t_ref += dt_ref
+        t_xml += dt_xml
+        mismatches += not ok
+
+    print(f"\nFixture: {'ok' if fixture_ok else 'MISMATCH'}   Files: {len(files)}   Mismatches: {mismatches}")
+    if files:
+        print(f"python-docx: {t_ref*1000:8.1f} ms  (+ {t_import*1000:.1f} ms import)")
+        print(f"xml:         {t_xml*1000:8.1f} ms")
+    sys.exit(1 if mismatches or not fixture_ok else 0)
+
+
+if __name__ == "__main__":
+    main()
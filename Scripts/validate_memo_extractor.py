@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Check analyze_pkwap_memos.scan_memo() against the reference extract_* functions.
+
+For every *_PK-WAP.md under --memo-dir (searched recursively), compares
+scan_memo() with extract_pk_level, extract_recursions, extract_agentic_moves,
+extract_notable_features and extract_quotes field by field, plus a built-in
+set of edge cases (missing sections, empty quote pairs, unterminated quotes,
+level-name fallback, fold-back counting, text whose lowercase is longer).
+Reports mismatches and the time each implementation takes over the memo set.
+
+Usage:
+  python3 validate_memo_extractor.py --memo-dir "PK-WAP Memos"
+  python3 validate_memo_extractor.py --memo-dir anchor_memos --repeat 20
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import analyze_pkwap_memos as apm
+
+EDGE_CASES = {
+    "empty": "",
+    "highest_roman": "Highest pk level: IV – Property Noticing\nRecursions: 3\n",
+    "highest_next_line": "Highest PK Level:\n5 - Formalising (clear)\n",
+    "fallback_levels": "Moves between Image Having and Image Making, then Observing.\n",
+    "fallback_case": "observing and inventising in lower case do not count\n",
+    "recursion_later": "recursion happens\n\nNumber of Recursions: 4\n",
+    "foldback_count": "A fold-back here, a foldback there; recursive  movement once. Fold-backs?\n",
+    "quotes_pairs": 'He said "" then "one" and ""two"" and "three\nlines" and "four" "open',
+    "sections": ("## Agentic Moves:\n- first move - with dash\n2. numbered\n\n"
+                 "Notable features\n* star item\n# Next heading\n- not in section\n"),
+    "section_no_newline": "Agentic Moves: none\nagentic move\n- later item\n",
+    "section_at_end": "Notable Feature:\n- last line without newline",
+    "lowercase_longer": "İ Recursion: 2\nAgentic Moves\n- İ move\n",
+}
+
+
+def reference(text):
+    return {
+        'pk_level': apm.extract_pk_level(text),
+        'recursions': apm.extract_recursions(text),
+        'agentic_moves': apm.extract_agentic_moves(text),
+        'notable_features': apm.extract_notable_features(text),
+        'quotes': apm.extract_quotes(text),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare scan_memo() with the reference memo extractors.")
+    ap.add_argument("--memo-dir", type=Path, default=None, help="Folder of *_PK-WAP.md memos (searched recursively)")
+    ap.add_argument("--repeat", type=int, default=5, help="Timing passes over the memo set (default 5)")
+    args = ap.parse_args()
+
+    texts = dict(("edge:" + name, text) for name, text in EDGE_CASES.items())
+    if args.memo_dir:
+        files = sorted(args.memo_dir.expanduser().rglob("*_PK-WAP.md"))
+        if not files:
+            raise SystemExit(f"[abort] no *_PK-WAP.md files under {args.memo_dir}")
+        for path in files:
+            texts[str(path.relative_to(args.memo_dir))] = path.read_text(encoding="utf-8")
+
+    print("=" * 90)
+    print(f"MEMO EXTRACTOR PARITY: scan_memo vs extract_*  ({len(texts)} texts)")
+    print("=" * 90)
+
+    mismatches = 0
+    for name, text in texts.items():
+        ref, got = reference(text), apm.scan_memo(text)
+        bad = [field for field in ref if ref[field] != got[field]]
+        if not bad:
+            print(f"  ok        {name}")
+            continue
+        mismatches += 1
+        print(f"  MISMATCH  {name}")
+        for field in bad:
+            print(f"      {field}: reference={ref[field]!r}")
+            print(f"      {' ' * len(field)}  scan     ={got[field]!r}")
+
+    memos = [text for name, text in texts.items() if not name.startswith("edge:")] or list(texts.values())
+    timings = {}
+    for label, fn in (("extract_*", reference), ("scan_memo", apm.scan_memo)):
+        best = None
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            for text in memos:
+                fn(text)
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        timings[label] = best
+
+    print(f"\nTiming over {len(memos)} text(s), best of {args.repeat}:")
+    for label, sec in timings.items():
+        print(f"  {label:<10} {sec * 1000:8.2f} ms  ({sec * 1e6 / len(memos):.0f} us/memo)")
+    print("\nOK" if not mismatches else f"\n{mismatches} mismatching text(s)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Check recount_from_annot.parse_annot_file() against the line-by-line recount.
+
+For every *__annotated.txt under --outdir/annotated, recounts each line with
+is_preamble_line / strip_leading_tag / count_words_no_tags (the original
+per-line loop) and compares with the parse-once engine at several uncertain
+weights. Word totals must agree exactly for weights that are binary fractions
+(0, 0.25, 0.5, 0.75, 1). For other weights, the two can differ by one word at
+an exact .5: the per-line loop adds w*n line by line, while the engine
+computes w * (sum of n). There the unrounded totals must agree to within 1e-9
+words. Also reports the time each implementation takes per file.
+
+Usage:
+  python3 validate_recount_engine.py --outdir runs/screen_2026-01
+  python3 validate_recount_engine.py --outdir runs/screen_2026-01 --repeat 10
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import recount_from_annot as rc
+
+EXACT_WEIGHTS = (0.0, 0.25, 0.5, 0.75, 1.0)
+OTHER_WEIGHTS = (0.1, 0.3, 0.35, 0.6, 0.9)
+
+
+def reference_totals(annot_path, uncertain_weight):
+    """Unrounded (student, ai, unknown) totals from the original per-line loop."""
+    st = ai = unk = 0.0
+    with open(annot_path, encoding="utf-8") as f:
+        for raw in f:
+            line = raw.rstrip("\n")
+            if not line or rc.is_preamble_line(line):
+                continue
+            label, tag_uncertain, rest = rc.strip_leading_tag(line)
+            n = rc.count_words_no_tags(rest)
+            if n == 0:
+                continue
+            w = 1.0 if not tag_uncertain else uncertain_weight
+            if label == "STUDENT":
+                st += w * n
+            elif label == "AI":
+                ai += w * n
+            else:
+                unk += n
+    return st, ai, unk
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare the parse-once recount engine with the per-line recount.")
+    ap.add_argument("--outdir", required=True, help="Run folder that contains annotated/")
+    ap.add_argument("--repeat", type=int, default=3, help="Timing passes over the files (default 3)")
+    args = ap.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.outdir, "annotated", "*__annotated.txt")))
+    if not files:
+        raise SystemExit(f"[abort] no __annotated.txt files in {os.path.join(args.outdir, 'annotated')}")
+
+    print("=" * 90)
+    print(f"RECOUNT ENGINE PARITY: parse_annot_file vs per-line recount  ({len(files)} files)")
+    print("=" * 90)
+
+    mismatches = 0
+    for path in files:
+        parsed = rc.parse_annot_file(path)
+        bad = []
+        for w in EXACT_WEIGHTS + OTHER_WEIGHTS:
+            ref = reference_totals(path, w)
+            got = rc.weighted_totals(parsed["classes"], w)
+            if w in EXACT_WEIGHTS:
+                ok = ref == got
+            else:
+                ok = all(abs(a - b) <= 1e-9 for a, b in zip(ref, got))
+            if not ok:
+                bad.append(f"w={w:g}: reference={ref} engine={got}")
+        if not bad:
+            print(f"  ok        {parsed['filename']}")
+            continue
+        mismatches += 1
+        print(f"  MISMATCH  {parsed['filename']}")
+        for line in bad:
+            print(f"      {line}")
+
+    timings = {}
+    for label, fn in (("per-line", lambda p: reference_totals(p, 0.5)),
+                      ("engine", lambda p: rc.weighted_totals(rc.parse_annot_file(p)["classes"], 0.5))):
+        best = None
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            for path in files:
+                fn(path)
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        timings[label] = best
+
+    print(f"\nTiming over {len(files)} file(s), best of {args.repeat} (numpy: {'yes' if rc.np is not None else 'no'}):")
+    for label, sec in timings.items():
+        print(f"  {label:<9} {sec * 1000:8.2f} ms  ({sec * 1e6 / len(files):.0f} us/file)")
+    print("\nOK" if not mismatches else f"\n{mismatches} mismatching file(s)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Differential check of the compiled-regex tokenizer in pk_screen_v2_2.py.
+
+Compares line_token_count() (token_counts engine) against the original
+per-character pipeline (count_cjk_runs -> tokenize_mathish -> tokenize_basic_english)
+on every line of every transcript in --input, then times both on math-heavy lines.
+
+Usage:
+  python3 validate_tokenizer.py --input "Data Formatted to Analyze"
+  python3 validate_tokenizer.py --input screen_run1/annotated --show 20
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import pk_screen_v2_2 as pk
+
+
+def reference_token_count(text: str) -> int:
+    """line_token_count() as it was before the token_counts engine."""
+    if not text:
+        return 0
+    if not re.search(r"[\w]", text) and not pk.CJK_RE.search(text):
+        return 0
+    cjk_count, rest = pk.count_cjk_runs(text)
+    math_count = pk.tokenize_mathish(rest)
+    rest_wo_math = re.sub(pk.MATH_RE, " ", rest)
+    basic = pk.tokenize_basic_english(rest_wo_math)
+    return cjk_count + math_count + basic
+
+
+def corpus_lines(in_dir: Path):
+    for path in sorted(in_dir.iterdir()):
+        if path.suffix.lower() not in {".txt", ".docx"}:
+            continue
+        text = pk.normalize_text(pk.load_text(path))
+        for ln in text.split("\n"):
+            yield path.name, ln
+
+
+def time_it(fn, lines, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for ln in lines:
+            fn(ln)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check token_counts() against the per-character tokenizer.")
+    ap.add_argument("--input", required=True, help="Folder of .txt/.docx transcripts (or __annotated.txt files)")
+    ap.add_argument("--show", type=int, default=10, help="Mismatches to print (default 10)")
+    args = ap.parse_args()
+
+    in_dir = Path(args.input).expanduser()
+    if not in_dir.is_dir():
+        raise SystemExit(f"[abort] {in_dir} is not a directory")
+
+    print("=" * 90)
+    print("TOKENIZER DIFFERENTIAL CHECK")
+    print("=" * 90)
+
+    lines = []
+    mismatches = 0
+    for fname, ln in corpus_lines(in_dir):
+        lines.append(ln)
+        a = reference_token_count(ln)
+        b = pk.line_token_count(ln)
+        if a != b:
+            mismatches += 1
+            if mismatches <= args.show:
+                print(f"  MISMATCH {fname}: ref={a} new={b}  {ln[:80]!r}")
+
+    print(f"\nLines checked: {len(lines)}")
+    print(f"Mismatches:    {mismatches}")
+
+    math_lines = [ln for ln in lines if len(pk.MATH_RE.findall(ln)) >= 3]
+    for label, sample in (("all lines", lines), ("math-heavy lines", math_lines)):
+        if not sample:
+            continue
+        t_ref = time_it(reference_token_count, sample)
+        t_new = time_it(pk.line_token_count, sample)
+        speedup = t_ref / t_new if t_new > 0 else float("inf")
+        print(f"\nTiming, {label} ({len(sample)}):")
+        print(f"  per-character: {t_ref*1000:8.1f} ms")
+        print(f"  token_counts:  {t_new*1000:8.1f} ms   ({speedup:.1f}x)")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()